@@ -0,0 +1,186 @@
+"""RSS of the gateway cache under each cache profile, for synthetic guilds.
+
+Every profile is fed the payloads it would get from the gateway: with the
+presences intent GUILD_CREATE of a large guild carries the online members,
+the full profile chunks every guild at startup and the lean one only the
+guilds where commands are used.
+
+usage: python -m benchmarks.cache_memory [--members 50000] [--guilds 10] [--active 0.2] [--messages 5000]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+from typing import List
+
+import disnake
+from disnake.state import ChunkRequest
+
+from cogs.utils.cache_profile import PROFILES
+
+GUILD_ID = 1 << 40
+USER_ID = 1 << 41
+ONLINE = .2  # share of members online
+CHUNK_SIZE = 1000  # members per GUILD_MEMBERS_CHUNK, as sent by Discord
+
+def rss() -> int:
+    with open('/proc/self/statm') as fp:
+        return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def guild_id(g: int) -> int:
+    return GUILD_ID + g * 16
+
+def user(i: int) -> dict:
+    return {'id': str(USER_ID + i), 'username': f'user{i}', 'discriminator': f'{i % 10000:04}', 'avatar': None}
+
+def roles(g: int) -> List[dict]:
+    roles = [{'id': str(guild_id(g) + 2 + r), 'name': f'role{r}', 'permissions': '0', 'position': r,
+              'color': 0, 'hoist': False, 'managed': False, 'mentionable': False} for r in range(5)]
+    roles.append({'id': str(guild_id(g)), 'name': '@everyone', 'permissions': '0', 'position': 0,
+                  'color': 0, 'hoist': False, 'managed': False, 'mentionable': False})
+    return roles
+
+def member(g: int, i: int) -> dict:
+    return {
+        'user': user(i),
+        'roles': [r['id'] for r in random.sample(roles(g)[:-1], 2)],
+        'joined_at': '2021-10-01T00:00:00+00:00',
+        'deaf': False,
+        'mute': False,
+    }
+
+def presence(i: int) -> dict:
+    return {'user': {'id': user(i)['id']}, 'status': 'online', 'activities': [], 'client_status': {'desktop': 'online'}}
+
+def guild_payload(g: int, users: range, presences: bool) -> dict:
+    # a large guild only comes with its online members, and only with the presences intent
+    online = [i for i in users if random.random() < ONLINE] if presences else []
+    return {
+        'id': str(guild_id(g)),
+        'name': f'benchmark {g}',
+        'owner_id': user(users[0])['id'],
+        'member_count': len(users),
+        'large': True,
+        'roles': roles(g),
+        'emojis': [],
+        'features': [],
+        'channels': [{'id': str(guild_id(g) + 1), 'type': 0, 'name': 'general', 'position': 0, 'permission_overwrites': []}],
+        'members': [member(g, i) for i in online],
+        'presences': [presence(i) for i in online],
+    }
+
+def chunk_payloads(g: int, users: range, presences: bool, nonce: str) -> List[dict]:
+    chunks = [users[i:i + CHUNK_SIZE] for i in range(0, len(users), CHUNK_SIZE)]
+    return [
+        {
+            'guild_id': str(guild_id(g)),
+            'members': [member(g, i) for i in chunk],
+            'presences': [presence(i) for i in chunk if random.random() < ONLINE] if presences else [],
+            'chunk_index': index,
+            'chunk_count': len(chunks),
+            'nonce': nonce,
+        }
+        for index, chunk in enumerate(chunks)
+    ]
+
+def message_payload(i: int, g: int, users: range) -> dict:
+    author = random.choice(users)
+    return {
+        'id': str(USER_ID * 2 + i),
+        'channel_id': str(guild_id(g) + 1),
+        'guild_id': str(guild_id(g)),
+        'author': user(author),
+        'member': {'roles': [], 'joined_at': '2021-10-01T00:00:00+00:00', 'deaf': False, 'mute': False},
+        'content': 'some message content ' * 5,
+        'timestamp': '2021-10-01T00:00:00+00:00',
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [],
+        'mention_roles': [],
+        'attachments': [],
+        'embeds': [],
+        'pinned': False,
+        'type': 0,
+    }
+
+async def measure(profile_name: str, members: int, guilds: int, active: float, messages: int) -> dict:
+    profile = PROFILES[profile_name]()
+    client = disnake.Client(**profile.bot_kwargs())
+    state = client._connection
+    presences = profile.intents.presences
+    per_guild = members // guilds
+    users = [range(g * per_guild, (g + 1) * per_guild) for g in range(guilds)]
+    # commands are used in the first guilds, lean chunks them on the first use
+    active_guilds = max(round(guilds * active), 1)
+    chunked = [
+        g for g in range(guilds)
+        if profile.intents.members and (
+            profile.chunk_guilds_at_startup or (profile.lazy_chunk and g < active_guilds)
+        )
+    ]
+
+    # everything the gateway would send is built before the baseline and kept alive
+    # until after the second reading, so only the cache is measured
+    guild_data = [guild_payload(g, users[g], presences) for g in range(guilds)]
+    requests = {g: ChunkRequest(guild_id(g), asyncio.get_running_loop(), state._get_guild, cache=True) for g in chunked}
+    chunk_data = [chunk for g in chunked for chunk in chunk_payloads(g, users[g], presences, requests[g].nonce)]
+    message_data = [message_payload(i, i % active_guilds, users[i % active_guilds]) for i in range(messages)]
+    gc.collect()
+    before = rss()
+
+    for data in guild_data:
+        state._add_guild_from_data(data)
+    for request in requests.values():
+        state._chunk_requests[request.nonce] = request
+    for data in chunk_data:
+        state.parse_guild_members_chunk(data)
+    for data in message_data:
+        state.parse_message_create(data)
+    gc.collect()
+    after = rss()
+    del guild_data, chunk_data, message_data
+
+    return {
+        'profile': profile_name,
+        'cached_members': sum(len(guild.members) for guild in client.guilds),
+        'chunked_guilds': len(chunked),
+        'cached_messages': len(client.cached_messages),
+        'rss_mb': (after - before) / 2 ** 20,
+        'rss_mb_per_10k_members': (after - before) / 2 ** 20 / members * 10_000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--members', type=int, default=50_000, help='in all guilds together')
+    parser.add_argument('--guilds', type=int, default=10)
+    parser.add_argument('--active', type=float, default=.2, help='share of guilds where commands are used')
+    parser.add_argument('--messages', type=int, default=5_000)
+    parser.add_argument('--profile', choices=PROFILES, help='measure one profile in this process')
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(asyncio.run(measure(args.profile, args.members, args.guilds, args.active, args.messages))))
+        return
+
+    # each profile in a fresh process, so the measurements don't share an allocator state
+    for name in PROFILES:
+        out = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.cache_memory', '--profile', name,
+             '--members', str(args.members), '--guilds', str(args.guilds),
+             '--active', str(args.active), '--messages', str(args.messages)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(out)
+        print(
+            f'{name:>8}: {result["rss_mb_per_10k_members"]:7.2f} MiB per 10k members '
+            f'({result["cached_members"]} members, {result["cached_messages"]} messages cached, '
+            f'{result["chunked_guilds"]} guilds chunked)'
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""charinfo autocomplete latency while a 25 character input is typed one character at a time.
+
+usage: python -m benchmarks.charinfo_autocomp [--rounds 2000]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from cogs import meta
+
+async def uncached(inter, value):
+    return {
+        meta.to_string(c, for_autocomp=True): value
+        for c in value
+    }
+
+async def measure(func, inputs, rounds: int):
+    timings = []
+    for r in range(rounds):
+        inter = SimpleNamespace(author=SimpleNamespace(id=r % 50))
+        text = inputs[r % len(inputs)]
+        for i in range(1, len(text) + 1):
+            start = time.perf_counter()
+            await func(inter, text[:i])
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return statistics.mean(timings), timings[len(timings) // 2], timings[int(len(timings) * .99)]
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    alphabet = [chr(c) for c in range(0x20, 0x2fff) if meta.unicodedata.name(chr(c), None)]
+    inputs = [''.join(random.choices(alphabet, k=25)) for _ in range(100)]
+
+    for name, func in (('uncached', uncached), ('memoized', meta.charinfo_autocomp)):
+        mean, p50, p99 = await measure(func, inputs, args.rounds)
+        print(f'{name:>9}: mean {mean * 1e6:6.1f}us  p50 {p50 * 1e6:6.1f}us  p99 {p99 * 1e6:6.1f}us')
+
+if __name__ == '__main__':
+    asyncio.run(main())
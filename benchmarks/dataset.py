@@ -0,0 +1,200 @@
+"""Synthetic tags, aliases, reminders and command usage in realistic volumes.
+
+Names are built from a small vocabulary whose words are Zipf distributed,
+like real tag names ("async", "embed" and "slash" come up all the time),
+most tags have no aliases while a few have many, and uses follow Zipf's law.
+
+usage: python -m benchmarks.dataset data/bench.sqlite [--tags 100000] [--reminders 10000] [--commands 1000000]
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import os
+import random
+import time
+from collections import Counter
+from typing import Iterable, Iterator, List, Sequence, TypeVar
+
+from tortoise import Tortoise
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
+
+from cogs.utils import db
+from cogs.utils.db.remind import Reminders
+from cogs.utils.db.stats import Commands, CommandsRollup
+from cogs.utils.db.tags import TagLookup, TagTable
+
+T = TypeVar('T')
+
+BATCH_SIZE = 5000
+VOCABULARY = (
+    'async await embed slash command button select modal view intents member guild channel role '
+    'permission error traceback install venv pip python disnake discord token bot cog extension '
+    'listener event task loop database sqlite postgres orm query cache rate limit webhook thread '
+    'message reaction emoji sticker attachment file image json http request session docs example '
+    'snippet class function decorator context manager typing generator iterator list dict set '
+    'string format regex datetime timezone sleep timeout shard gateway voice presence status '
+    'activity autocomplete option choice converter check cooldown help meta paginator menu'
+).split()
+COMMANDS = (
+    'tag show', 'tag all', 'tag info', 'tag create', 'tag alias', 'tag edit', 'tag delete',
+    'charinfo', 'charsearch', 'remind me', 'remind list', 'remind delete', 'stats commands',
+    'notifications', 'addbot',
+)
+ZIPF_S = 1.1
+
+def zipf_weights(count: int, s: float = ZIPF_S) -> List[float]:
+    return list(itertools.accumulate(1 / rank ** s for rank in range(1, count + 1)))
+
+def zipf_choices(population: Sequence[T], k: int, s: float = ZIPF_S) -> List[T]:
+    return random.choices(population, cum_weights=zipf_weights(len(population), s), k=k)
+
+def batched(items: Iterable[T], size: int = BATCH_SIZE) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+def tag_names(count: int) -> Iterator[str]:
+    cum_weights = zipf_weights(len(VOCABULARY))
+    seen = set()
+    while len(seen) < count:
+        words = random.choices(VOCABULARY, cum_weights=cum_weights, k=random.choice((1, 2, 2, 3, 3, 4)))
+        name = random.choice((' ', '-', '_')).join(words)[:50]
+        if name in seen:
+            # popular word combinations run out, numbered variants are common too
+            suffix = f' {len(seen)}'
+            name = name[:50 - len(suffix)] + suffix
+        if name not in seen:
+            seen.add(name)
+            yield name
+
+def alias_count() -> int:
+    # geometric, most tags have no aliases and a few have a lot
+    count = 0
+    while random.random() < .3 and count < 20:
+        count += 1
+    return count
+
+async def bulk(model: type, rows: Iterable[Model]) -> int:
+    created = 0
+    for batch in batched(rows):
+        async with in_transaction('master'):
+            # models use the transaction's connection inside the block
+            await model.bulk_create(batch)
+        created += len(batch)
+    return created
+
+async def generate_tags(count: int, owners: int = 2000) -> int:
+    names = list(tag_names(count))
+    uses = [int(100_000 / rank ** ZIPF_S) for rank in range(1, count + 1)]
+    random.shuffle(uses)
+    owner_ids = zipf_choices(range(10 ** 17, 10 ** 17 + owners), count)
+    now = datetime.datetime.utcnow()
+
+    await bulk(TagTable, (
+        TagTable(
+            name=name,
+            content=' '.join(random.choices(VOCABULARY, k=random.randint(5, 300)))[:2000],
+            owner_id=owner_id,
+            uses=use_count,
+            created_at=now - datetime.timedelta(days=random.random() * 1000),
+        )
+        for name, owner_id, use_count in zip(names, owner_ids, uses)
+    ))
+
+    tags = await TagTable.all().only('id', 'name', 'owner_id')
+    taken = set(names)
+    def lookups():
+        for tag in tags:
+            yield TagLookup(name=tag.name, original_id=tag.id, owner_id=tag.owner_id)
+            for i in range(alias_count()):
+                suffix = f' alias{i}'
+                alias = tag.name[:50 - len(suffix)] + suffix
+                if alias not in taken:
+                    taken.add(alias)
+                    yield TagLookup(name=alias, original_id=tag.id, owner_id=tag.owner_id)
+
+    return await bulk(TagLookup, lookups())
+
+async def generate_reminders(count: int, authors: int = 5000) -> int:
+    now = datetime.datetime.utcnow()
+    author_ids = zipf_choices(range(10 ** 17, 10 ** 17 + authors), count)
+    return await bulk(Reminders, (
+        Reminders(
+            # mostly soon, some far away
+            expires=now + datetime.timedelta(seconds=random.expovariate(1 / (3 * 24 * 3600))),
+            event='reminder',
+            author_id=author_id,
+            extra={'channel_id': 808030843078836254, 'text': ' '.join(random.choices(VOCABULARY, k=8))},
+        )
+        for author_id in author_ids
+    ))
+
+async def generate_commands(count: int, days: int = 60) -> int:
+    now = datetime.datetime.utcnow()
+    commands = zipf_choices(COMMANDS, count)
+    author_ids = zipf_choices(range(10 ** 17, 10 ** 17 + 20_000), count)
+    rollups = Counter()
+
+    def rows():
+        # streamed, a million model instances don't fit in memory comfortably
+        for command, author_id in zip(commands, author_ids):
+            used = now - datetime.timedelta(seconds=random.random() * days * 86400)
+            rollups[used.replace(minute=0, second=0, microsecond=0), command] += 1
+            yield Commands(
+                guild_id=808030843078836254,
+                channel_id=random.randrange(10 ** 17, 10 ** 17 + 50),
+                author_id=author_id,
+                used=used,
+                command=command,
+            )
+
+    created = await bulk(Commands, rows())
+    await bulk(CommandsRollup, (
+        CommandsRollup(hour=hour, command=command, count=uses)
+        for (hour, command), uses in rollups.items()
+    ))
+    return created
+
+def orm_config(path: str) -> dict:
+    return {
+        'apps': {
+            'tags': {'models': ['cogs.utils.db.tags'], 'default_connection': 'master'},
+            'remind': {'models': ['cogs.utils.db.remind'], 'default_connection': 'master'},
+            'stats': {'models': ['cogs.utils.db.stats'], 'default_connection': 'master'},
+        },
+        'connections': {
+            'master': db.sqlite_connection(path),
+            **{f'reader_{i}': db.sqlite_connection(path, query_only='ON') for i in range(db.READ_POOL_SIZE or 4)}
+        }
+    }
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', help='SQLite file to create, must not exist')
+    parser.add_argument('--tags', type=int, default=100_000)
+    parser.add_argument('--reminders', type=int, default=10_000)
+    parser.add_argument('--commands', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if os.path.exists(args.path):
+        parser.error(f'{args.path} already exists')
+    random.seed(args.seed)
+
+    await db.init(orm_config=orm_config(args.path))
+    try:
+        for name, generate, count in (
+            ('tags', generate_tags, args.tags),
+            ('reminders', generate_reminders, args.reminders),
+            ('commands', generate_commands, args.commands),
+        ):
+            start = time.perf_counter()
+            rows = await generate(count) if count else 0
+            print(f'{name:>10}: {rows} rows in {time.perf_counter() - start:.1f}s')
+    finally:
+        # open connections keep the process alive after an error
+        await Tortoise.close_connections()
+
+if __name__ == '__main__':
+    asyncio.run(main())
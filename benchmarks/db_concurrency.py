@@ -0,0 +1,75 @@
+"""Concurrent `tag show` throughput with the default SQLite setup vs the tuned one.
+
+usage: python -m benchmarks.db_concurrency [--tags 5000] [--requests 5000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from tortoise import Tortoise
+from tortoise.expressions import F
+
+from cogs.utils import db
+from cogs.utils.db.tags import TagTable, TagLookup
+
+def orm_config(path: str, tuned: bool) -> dict:
+    apps = {'tags': {'models': ['cogs.utils.db.tags'], 'default_connection': 'master'}}
+    if not tuned:
+        return {
+            'apps': apps,
+            'connections': {'master': f'sqlite://{path}?journal_mode=DELETE&synchronous=FULL'}
+        }
+    return {
+        'apps': apps,
+        'connections': {
+            'master': db.sqlite_connection(path),
+            **{f'reader_{i}': db.sqlite_connection(path, query_only='ON') for i in range(db.READ_POOL_SIZE or 4)}
+        }
+    }
+
+async def seed(count: int):
+    tags = [TagTable(name=f'tag-{i}', content='x' * 200, owner_id=1) for i in range(count)]
+    await TagTable.bulk_create(tags)
+    tags = await TagTable.all().only('id', 'name')
+    await TagLookup.bulk_create([TagLookup(name=t.name, original_id=t.id, owner_id=1) for t in tags])
+
+async def tag_show(name: str):
+    async with db.reader() as conn:
+        tag = await TagTable.filter(name=name).using_db(conn).only('id', 'content').first()
+    await TagTable.filter(id=tag.id).update(uses=F('uses') + 1)
+
+async def run(path: str, tuned: bool, args) -> float:
+    await db.init(orm_config=orm_config(path, tuned))
+    await seed(args.tags)
+
+    names = [f'tag-{random.randrange(args.tags)}' for _ in range(args.requests)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(name):
+        async with semaphore:
+            await tag_show(name)
+
+    start = time.perf_counter()
+    await asyncio.gather(*map(one, names))
+    elapsed = time.perf_counter() - start
+    await Tortoise.close_connections()
+    return args.requests / elapsed
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tags', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for tuned in (False, True):
+            path = os.path.join(tmp, f'{"tuned" if tuned else "default"}.sqlite')
+            throughput = await run(path, tuned, args)
+            print(f'{"tuned" if tuned else "default":>8}: {throughput:8.1f} tag shows/s')
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""Time `db.init()` takes on a boot, with the schema fingerprint check and without it.
+
+usage: python -m benchmarks.db_startup [--boots 20] [--tags 100000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from tortoise import Tortoise
+
+from cogs.utils import db
+
+from .dataset import generate_tags
+
+def orm_config(path: str) -> dict:
+    return {
+        'apps': db.TORTOISE_ORM['apps'],
+        'connections': {
+            'master': db.sqlite_connection(path),
+            **{name: db.sqlite_connection(path, query_only='ON') for name in db.READERS}
+        }
+    }
+
+async def boot(config: dict, fingerprint: bool) -> float:
+    start = time.perf_counter()
+    if fingerprint:
+        await db.init(orm_config=config)
+    else:
+        # what every boot did before, DDL for all models
+        await Tortoise.close_connections()
+        await Tortoise.init(config=config)
+        await Tortoise.generate_schemas(safe=True)
+    elapsed = time.perf_counter() - start
+    await Tortoise.close_connections()
+    return elapsed
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--boots', type=int, default=20)
+    parser.add_argument('--tags', type=int, default=100_000, help='rows in the DB, generate_schemas cost grows with the file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = orm_config(os.path.join(tmp, 'startup.sqlite'))
+        start = time.perf_counter()
+        await db.init(orm_config=config)
+        print(f'first boot: {(time.perf_counter() - start) * 1000:.1f}ms')
+        if args.tags:
+            await generate_tags(args.tags)
+        await Tortoise.close_connections()
+
+        for fingerprint in (False, True):
+            timings = sorted([await boot(config, fingerprint) for _ in range(args.boots)])
+            print(
+                f'{"fingerprint" if fingerprint else "generate_schemas":>16}: '
+                f'median {timings[len(timings) // 2] * 1000:7.1f}ms  max {timings[-1] * 1000:7.1f}ms'
+            )
+
+if __name__ == '__main__':
+    asyncio.run(main())
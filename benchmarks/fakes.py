@@ -0,0 +1,177 @@
+"""Stand-ins for the Discord side of interactions, so cog code runs without a gateway."""
+import datetime
+import itertools
+import json
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from cogs.utils.metrics import Metrics
+
+_ids = itertools.count(1 << 50)
+
+class FakeUser:
+    def __init__(self, id: int, name: str = 'user'):
+        self.id = id
+        self.name = self.display_name = name
+        self.display_avatar = SimpleNamespace(url=f'https://cdn.discordapp.com/embed/avatars/{id % 5}.png')
+        self.bot = False
+
+    def __str__(self):
+        return f'{self.name}#0000'
+
+class FakeChannel:
+    def __init__(self, id: int):
+        self.id = id
+        self.sent: List[Dict[str, Any]] = []
+
+    def permissions_for(self, _):
+        return SimpleNamespace(embed_links=True)
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append({'content': content, **kwargs})
+        return FakeMessage(self, FakeUser(0, 'bot'), content or '')
+
+class FakeMessage:
+    def __init__(self, channel: FakeChannel, author: FakeUser, content: str):
+        self.id = next(_ids)
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.guild = None
+
+    async def edit(self, **kwargs):
+        pass
+
+    async def reply(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+class FakeResponse:
+    def __init__(self):
+        self.calls: List[Any] = []
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, kind: str, *args, **kwargs):
+        if self._done:
+            raise RuntimeError('This interaction has already been responded to before')
+        self._done = True
+        self.calls.append((kind, args, kwargs))
+
+    async def send_message(self, *args, **kwargs):
+        await self._respond('send_message', *args, **kwargs)
+
+    async def edit_message(self, *args, **kwargs):
+        await self._respond('edit_message', *args, **kwargs)
+
+    async def defer(self, *args, **kwargs):
+        await self._respond('defer', *args, **kwargs)
+
+    async def autocomplete(self, *, choices):
+        await self._respond('autocomplete', choices=choices)
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent: List[Any] = []
+
+    async def send(self, *args, **kwargs):
+        self.sent.append((args, kwargs))
+
+class FakeInteraction:
+    """Enough of ``ApplicationCommandInteraction`` and ``MessageInteraction`` for the cogs."""
+
+    def __init__(
+        self, bot: 'FakeBot', author: FakeUser, channel: FakeChannel, *,
+        custom_id: Optional[str] = None, values: Optional[List[str]] = None
+    ):
+        self.id = next(_ids)
+        self.bot = bot
+        self.author = self.user = author
+        self.channel = channel
+        self.channel_id = channel.id
+        self.guild = None
+        self.guild_id = None
+        self.me = bot.user
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.data = SimpleNamespace(custom_id=custom_id)
+        self.values = values
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+    async def original_message(self):
+        return FakeMessage(self.channel, self.bot.user, '')
+
+    async def delete_original_message(self):
+        pass
+
+class FakeHTTPResponse:
+    def __init__(self, body: Any):
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def text(self) -> str:
+        return self.body if isinstance(self.body, str) else json.dumps(self.body)
+
+    async def json(self) -> Any:
+        return self.body
+
+class FakeHTTPSession:
+    """Answers GitHub API requests with canned bodies, by URL prefix."""
+
+    def __init__(self, routes: Dict[str, Any]):
+        self.routes = routes
+
+    def get(self, url: str, **kwargs) -> FakeHTTPResponse:
+        for prefix, body in self.routes.items():
+            if url.startswith(prefix):
+                return FakeHTTPResponse(body)
+        raise LookupError(url)
+
+class AdmitAll:
+    def try_acquire(self, command: str) -> None:
+        return None
+
+    def try_optional(self, command: str) -> None:
+        return None
+
+    def release(self, command: str):
+        pass
+
+class FakeBot:
+    def __init__(self, *, http_routes: Optional[Dict[str, Any]] = None):
+        self.user = FakeUser(1, 'bot')
+        self.owner = FakeUser(2, 'owner')
+        self.owner_ids = {self.owner.id}
+        self.metrics = Metrics()
+        self.admission = AdmitAll()
+        self.http_session = FakeHTTPSession(http_routes or {})
+        self._users: Dict[int, FakeUser] = {}
+        self._channels: Dict[int, FakeChannel] = {}
+
+    def get_user(self, id: int) -> FakeUser:
+        user = self._users.get(id)
+        if user is None:
+            user = self._users[id] = FakeUser(id, f'user{id}')
+        return user
+
+    async def fetch_user(self, id: int) -> FakeUser:
+        return self.get_user(id)
+
+    async def wait_until_db_ready(self) -> None:
+        # benchmarks make cogs after the DB is initialised
+        pass
+
+    def get_channel(self, id: int) -> FakeChannel:
+        channel = self._channels.get(id)
+        if channel is None:
+            channel = self._channels[id] = FakeChannel(id)
+        return channel
+
+    def interaction(self, author_id: int = 10, channel_id: int = 20, **kwargs) -> FakeInteraction:
+        return FakeInteraction(self, self.get_user(author_id), self.get_channel(channel_id), **kwargs)
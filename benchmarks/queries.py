@@ -0,0 +1,153 @@
+"""Latency of every query shape used by the tags cog, against a generated dataset.
+
+usage: python -m benchmarks.dataset data/bench.sqlite
+       python -m benchmarks.queries data/bench.sqlite [--iterations 500] [--explain]
+                                    [--output results.json] [--compare previous.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple
+
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.expressions import F
+
+from cogs.utils import db
+from cogs.utils.db.tags import TagLookup, TagTable, search_names
+
+from .dataset import orm_config
+from .replay import compare, git_commit, percentile
+
+class Shape(NamedTuple):
+    # makes the argument of one query from a sampled tag
+    argument: Callable[[TagTable], Any]
+    query: Callable[[BaseDBAsyncClient, Any], Awaitable]
+    # whole table reads are slow, they get fewer iterations
+    iterations_factor: float = 1.
+
+SHAPES: Dict[str, Shape] = {
+    # Tags.get_tag
+    'exact tag': Shape(
+        lambda tag: tag.name,
+        lambda conn, name: TagTable.filter(name=name).using_db(conn).only('id', 'name', 'content').first()
+    ),
+    'exact alias': Shape(
+        lambda tag: tag.name,
+        lambda conn, name: TagLookup.filter(name=name).using_db(conn).first().prefetch_related('original')
+    ),
+    # TagCreateView.name_button
+    'name exists': Shape(
+        lambda tag: tag.name,
+        lambda conn, name: TagLookup.filter(name=name).using_db(conn).limit(1)
+    ),
+    # name_autocomp and the "did you mean" of get_tag
+    'contains': Shape(
+        lambda tag: tag.name[:random.randint(2, 6)],
+        lambda conn, text: search_names(text, limit=20, using_db=conn)
+    ),
+    'contains miss': Shape(
+        lambda tag: tag.name[:4] + 'zq',
+        lambda conn, text: search_names(text, limit=3, using_db=conn)
+    ),
+    # tag info rank
+    'count by uses': Shape(
+        lambda tag: tag.uses,
+        lambda conn, uses: TagTable.filter(uses__gt=uses).using_db(conn).count()
+    ),
+    # tag all
+    'ordered listing': Shape(
+        lambda tag: None,
+        lambda conn, _: TagLookup.all().using_db(conn).order_by('name').only('id', 'name'),
+        iterations_factor=.02
+    ),
+    # tag show, the only write
+    'uses update': Shape(
+        lambda tag: tag.id,
+        lambda conn, id: TagTable.filter(id=id).using_db(conn).update(uses=F('uses') + 1)
+    ),
+}
+WRITES = {'uses update'}
+
+async def explain(conn: BaseDBAsyncClient, query: Any) -> str:
+    if not hasattr(query, 'sql'):
+        if hasattr(query, 'close'):
+            query.close()  # search_names coroutine, it won't be awaited
+        return '(not a single ORM query)'
+    sql = query.sql()
+    rows = await conn.execute_query_dict(f'EXPLAIN QUERY PLAN {sql}')
+    return sql + '\n' + '\n'.join(f'  {row["detail"]}' for row in rows)
+
+async def measure(shape: Shape, conn: BaseDBAsyncClient, tags: List[TagTable], iterations: int) -> dict:
+    iterations = max(int(iterations * shape.iterations_factor), 3)
+    timings = []
+    for _ in range(iterations):
+        argument = shape.argument(random.choice(tags))
+        start = time.perf_counter()
+        await shape.query(conn, argument)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'throughput': len(timings) / sum(timings),
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'p50_ms': percentile(timings, .5) * 1000,
+        'p95_ms': percentile(timings, .95) * 1000,
+        'p99_ms': percentile(timings, .99) * 1000,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', help='SQLite file made by benchmarks.dataset')
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--only', help='comma separated shape names')
+    parser.add_argument('--explain', action='store_true', help='print the query plan of every shape')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of a previous run')
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    # the dataset is only read from, except for the uses counter
+    await db.init(orm_config=orm_config(args.path))
+    master = Tortoise.get_connection('master')
+    tags = await TagTable.all().only('id', 'name', 'uses').limit(10_000)
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'tags': await TagTable.all().count(),
+            'lookups': await TagLookup.all().count(),
+            'iterations': args.iterations,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+    print(f'{results["meta"]["tags"]} tags, {results["meta"]["lookups"]} lookups')
+
+    names = args.only.split(',') if args.only else list(SHAPES)
+    for name in names:
+        shape = SHAPES[name]
+        async with db.reader() as reader:
+            conn = master if name in WRITES else reader
+            if args.explain:
+                print(await explain(conn, shape.query(conn, shape.argument(tags[0]))))
+            result = results['results'][name] = await measure(shape, conn, tags, args.iterations)
+        print(
+            f'{name:>16}: mean {result["mean_ms"]:8.3f}ms  p50 {result["p50_ms"]:8.3f}ms  '
+            f'p95 {result["p95_ms"]:8.3f}ms  p99 {result["p99_ms"]:8.3f}ms  ({result["iterations"]} runs)'
+        )
+    await Tortoise.close_connections()
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(results, json.load(fp))
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,196 @@
+"""Hot paths of the bot driven with fake interactions against a throwaway SQLite DB.
+
+usage: python -m benchmarks.replay [--tags 5000] [--requests 2000] [--concurrency 20]
+                                   [--only tag_show,name_autocomp] [--output results.json]
+                                   [--compare previous.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from tortoise import Tortoise
+
+from cogs import meta
+from cogs.snippets import Snippets
+from cogs.tags import Tags, name_autocomp
+from cogs.utils import db
+from cogs.utils.views import dispatch_persistent, make_custom_id
+
+from .db_concurrency import orm_config, seed
+from .fakes import FakeBot, FakeMessage
+
+SNIPPET_CHANNEL = 808035299094691882  # long snippets are sent there anyway
+SNIPPET_FILE = '\n'.join(f'    line {i} = some_function(argument, {i})  # comment' for i in range(5000))
+
+Scenario = Callable[[int], Awaitable[None]]
+
+def percentile(values: List[float], q: float) -> float:
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+def scenarios(bot: FakeBot, tags: Tags, snippets: Snippets, tag_count: int) -> Dict[str, Scenario]:
+    def tag_name() -> str:
+        return f'tag-{random.randrange(tag_count)}'
+
+    async def tag_show(i):
+        await tags.tag_show.callback(tags, bot.interaction(author_id=i), name=tag_name(), type='rich')
+
+    async def tag_show_raw(i):
+        await tags.tag_show.callback(tags, bot.interaction(author_id=i), name=tag_name(), type='raw')
+
+    async def autocomp(i):
+        # a prefix of a name, as if it was being typed
+        await name_autocomp(bot.interaction(author_id=i), tag_name()[:random.randint(3, 7)])
+
+    async def tag_info(i):
+        await tags.tag_info.callback(tags, bot.interaction(author_id=i), name=tag_name())
+
+    async def tag_all(i):
+        await tags.tag_all.callback(tags, bot.interaction(author_id=i))
+
+    async def tag_all_page(i):
+        custom_id = make_custom_id('tags:all', i, 0, random.randrange(max(tag_count // 20, 1)))
+        await dispatch_persistent(bot.interaction(author_id=i, custom_id=custom_id))
+
+    async def tag_all_jump(i):
+        custom_id = make_custom_id('tags:all:jump', i, 0, 0)
+        page = str(random.randrange(max(tag_count // 20, 1)))
+        await dispatch_persistent(bot.interaction(author_id=i, custom_id=custom_id, values=[page]))
+
+    alphabet = [chr(c) for c in range(0x20, 0x2fff) if meta.unicodedata.name(chr(c), None)]
+    async def charinfo(i):
+        text = ''.join(random.choices(alphabet, k=25))
+        inter = bot.interaction(author_id=i)
+        for end in range(1, len(text) + 1):
+            await meta.charinfo_autocomp(inter, text[:end])
+
+    async def snippet(i):
+        start = random.randrange(1, 4990)
+        content = f'look at https://github.com/owner/repo/blob/main/src/module.py#L{start}-L{start + 8}'
+        message = FakeMessage(bot.get_channel(SNIPPET_CHANNEL), bot.get_user(i), content)
+        await snippets.on_message(message)
+
+    return {
+        'tag_show': tag_show,
+        'tag_show_raw': tag_show_raw,
+        'name_autocomp': autocomp,
+        'tag_info': tag_info,
+        'tag_all': tag_all,
+        'tag_all_page': tag_all_page,
+        'tag_all_jump': tag_all_jump,
+        'charinfo_autocomp': charinfo,
+        'snippet': snippet,
+    }
+
+async def run_scenario(scenario: Scenario, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    timings: List[float] = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await scenario(i)
+            except Exception:
+                errors += 1
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'throughput': requests / elapsed,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'p50_ms': percentile(timings, .5) * 1000,
+        'p95_ms': percentile(timings, .95) * 1000,
+        'p99_ms': percentile(timings, .99) * 1000,
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(results: dict, previous: dict):
+    print(f'\ncompared to {previous["meta"]["commit"]}:')
+    for name, result in results['results'].items():
+        old = previous['results'].get(name)
+        if old is None:
+            continue
+        change = lambda key: (result[key] / old[key] - 1) * 100 if old[key] else 0.
+        print(
+            f'{name:>18}: throughput {change("throughput"):+6.1f}%  '
+            f'p50 {change("p50_ms"):+6.1f}%  p99 {change("p99_ms"):+6.1f}%'
+        )
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tags', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--only', help='comma separated scenario names')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of a previous run')
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    bot = FakeBot(http_routes={
+        'https://api.github.com/repos/owner/repo/branches': [{'name': 'main'}],
+        'https://api.github.com/repos/owner/repo/tags': [],
+        'https://api.github.com/repos/owner/repo/contents/': SNIPPET_FILE,
+    })
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'tags': args.tags,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        await db.init(orm_config=orm_config(os.path.join(tmp, 'replay.sqlite'), tuned=True))
+        await seed(args.tags)
+        # cogs load their DB state when made
+        tags = Tags(bot)
+        snippets = Snippets(bot)
+
+        all_scenarios = scenarios(bot, tags, snippets, args.tags)
+        names = args.only.split(',') if args.only else list(all_scenarios)
+        for name in names:
+            result = results['results'][name] = await run_scenario(all_scenarios[name], args.requests, args.concurrency)
+            print(
+                f'{name:>18}: {result["throughput"]:8.1f}/s  p50 {result["p50_ms"]:7.2f}ms  '
+                f'p95 {result["p95_ms"]:7.2f}ms  p99 {result["p99_ms"]:7.2f}ms'
+                + (f'  {result["errors"]} errors' if result['errors'] else '')
+            )
+        # the trending flush runs once more when cancelled, it needs the DB
+        tags.trending_flush_loop.cancel()
+        await asyncio.gather(tags.trending_flush_loop.get_task(), return_exceptions=True)
+        await Tortoise.close_connections()
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(results, json.load(fp))
+
+if __name__ == '__main__':
+    asyncio.run(main())
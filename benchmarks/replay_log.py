@@ -0,0 +1,232 @@
+"""Replays interactions recorded with `record_interactions=1` against a local DB.
+
+The recorded mix is driven through the same cog entry points as
+benchmarks.replay, at the recorded pace, faster, or as fast as possible.
+Tags named in the recording are created, next to ``--tags`` synthetic ones,
+unless an existing database (e.g. from benchmarks.dataset) is given.
+
+usage: python -m benchmarks.replay_log data/recordings/2021-11-01.jsonl.gz [--speed 1|10|max]
+                                       [--db data/bench.sqlite] [--concurrency 100]
+                                       [--output results.json] [--compare previous.json]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import platform
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from tortoise import Tortoise
+
+from cogs import meta
+from cogs.tags import Tags, name_autocomp
+from cogs.utils import db
+from cogs.utils.db.tags import TagLookup, TagTable
+from cogs.utils.views import dispatch_persistent, make_custom_id
+
+from .dataset import bulk, orm_config
+from .db_concurrency import seed
+from .fakes import FakeBot
+from .replay import compare, git_commit, percentile
+
+Handler = Callable[[FakeBot, dict], Awaitable[Any]]
+TAG_NAME_COMMANDS = ('tag show', 'tag info', 'tag edit', 'tag delete')
+
+def load(paths: List[str]) -> List[dict]:
+    entries = []
+    for path in paths:
+        with gzip.open(path, 'rt', encoding='utf-8') as fp:
+            entries.extend(json.loads(line) for line in fp if line.strip())
+    entries.sort(key=lambda e: e['time'])
+    return entries
+
+def value(entry: dict, name: str, default: Any = '') -> Any:
+    option = entry.get('options', {}).get(name, default)
+    if isinstance(option, dict):
+        # anonymized, only its length is known
+        return 'x' * option['len']
+    return option
+
+def user_id(entry: dict) -> int:
+    return int(entry['author'], 16) % 2 ** 53
+
+def handlers(tags: Tags, meta_cog: meta.Meta) -> Dict[str, Handler]:
+    def interaction(bot: FakeBot, entry: dict, **kwargs):
+        return bot.interaction(author_id=user_id(entry), channel_id=int(entry['channel'], 16) % 2 ** 53, **kwargs)
+
+    async def tag_show(bot, entry):
+        await tags.tag_show.callback(tags, interaction(bot, entry), name=value(entry, 'name'), type=value(entry, 'type', 'rich'))
+
+    async def tag_info(bot, entry):
+        await tags.tag_info.callback(tags, interaction(bot, entry), name=value(entry, 'name'))
+
+    async def tag_all(bot, entry):
+        await tags.tag_all.callback(tags, interaction(bot, entry))
+
+    async def tag_name_autocomp(bot, entry):
+        await name_autocomp(interaction(bot, entry), value(entry, entry.get('focused') or 'name'))
+
+    async def charinfo(bot, entry):
+        await meta_cog.charinfo.callback(meta_cog, interaction(bot, entry), characters=value(entry, 'characters'))
+
+    async def charinfo_autocomp(bot, entry):
+        await meta.charinfo_autocomp(interaction(bot, entry), value(entry, 'characters'))
+
+    async def charsearch(bot, entry):
+        await meta_cog.charsearch.callback(meta_cog, interaction(bot, entry), query=value(entry, 'query'))
+
+    async def charsearch_autocomp(bot, entry):
+        await meta.charsearch_autocomp(interaction(bot, entry), value(entry, 'query'))
+
+    async def tags_page(bot, entry):
+        action = entry['command'][len('component '):]
+        custom_id = make_custom_id(action, user_id(entry), 0, entry.get('page', 0))
+        await dispatch_persistent(interaction(bot, entry, custom_id=custom_id))
+
+    return {
+        'slash_command tag show': tag_show,
+        'slash_command tag info': tag_info,
+        'slash_command tag all': tag_all,
+        'slash_command charinfo': charinfo,
+        'slash_command charsearch': charsearch,
+        **{f'autocomplete {command}': tag_name_autocomp for command in TAG_NAME_COMMANDS},
+        'autocomplete charinfo': charinfo_autocomp,
+        'autocomplete charsearch': charsearch_autocomp,
+        'component component tags:all': tags_page,
+        'component component tags:all:edge': tags_page,
+    }
+
+async def seed_recorded(entries: List[dict]):
+    names = {
+        entry['options']['name']
+        for entry in entries
+        if entry['kind'] == 'slash_command' and entry['command'] in TAG_NAME_COMMANDS
+        and isinstance(entry.get('options', {}).get('name'), str)
+    }
+    existing = set(await TagTable.filter(name__in=list(names)).values_list('name', flat=True))
+    await bulk(TagTable, (TagTable(name=name, content='x' * 200, owner_id=1) for name in names - existing))
+    created = await TagTable.filter(name__in=list(names - existing)).only('id', 'name')
+    await bulk(TagLookup, (TagLookup(name=tag.name, original_id=tag.id, owner_id=1) for tag in created))
+
+async def replay(entries: List[dict], bot: FakeBot, routes: Dict[str, Handler], speed: Optional[float], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    timings: Dict[str, List[float]] = defaultdict(list)
+    behind: List[float] = []
+    errors: Counter = Counter()
+    skipped: Counter = Counter()
+    tasks = []
+
+    async def one(key: str, handler: Handler, entry: dict, scheduled: float):
+        async with semaphore:
+            started = time.perf_counter()
+            behind.append(max(started - scheduled, 0.))
+            try:
+                await handler(bot, entry)
+            except Exception:
+                errors[key] += 1
+            timings[key].append(time.perf_counter() - started)
+
+    first = entries[0]['time']
+    start = time.perf_counter()
+    for entry in entries:
+        key = f'{entry["kind"]} {entry["command"]}'
+        handler = routes.get(key)
+        if handler is None:
+            skipped[key] += 1
+            continue
+        scheduled = start
+        if speed is not None:
+            scheduled = start + (entry['time'] - first) / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(key, handler, entry, scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for key, values in sorted(timings.items()):
+        values.sort()
+        results[key] = {
+            'requests': len(values),
+            'errors': errors[key],
+            'throughput': len(values) / elapsed,
+            'mean_ms': sum(values) / len(values) * 1000,
+            'p50_ms': percentile(values, .5) * 1000,
+            'p95_ms': percentile(values, .95) * 1000,
+            'p99_ms': percentile(values, .99) * 1000,
+        }
+    behind.sort()
+    return {
+        'elapsed': elapsed,
+        'behind_schedule_p99_ms': percentile(behind, .99) * 1000 if behind else 0.,
+        'skipped': dict(skipped),
+        'results': results,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('recordings', nargs='+')
+    parser.add_argument('--speed', default='1', help='1 for the recorded pace, 10 for ten times faster, max for no pauses')
+    parser.add_argument('--db', help='existing SQLite file to replay against, it is written to')
+    parser.add_argument('--tags', type=int, default=5000, help='synthetic tags next to the recorded ones')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of a previous run')
+    args = parser.parse_args()
+    speed = None if args.speed == 'max' else float(args.speed)
+
+    entries = load(args.recordings)
+    if not entries:
+        parser.error('the recordings are empty')
+    print(f'{len(entries)} interactions over {entries[-1]["time"] - entries[0]["time"]:.0f}s')
+
+    bot = FakeBot()
+    with tempfile.TemporaryDirectory() as tmp:
+        await db.init(orm_config=orm_config(args.db or os.path.join(tmp, 'replay.sqlite')))
+        if not args.db:
+            await seed(args.tags)
+            await seed_recorded(entries)
+        # cogs load their DB state when made
+        tags = Tags(bot)
+        routes = handlers(tags, meta.Meta(bot))
+        run = await replay(entries, bot, routes, speed, args.concurrency)
+        # the trending flush runs once more when cancelled, it needs the DB
+        tags.trending_flush_loop.cancel()
+        await asyncio.gather(tags.trending_flush_loop.get_task(), return_exceptions=True)
+        await Tortoise.close_connections()
+
+    for key, result in run['results'].items():
+        print(
+            f'{key[:40]:>40}: {result["requests"]:>6}  p50 {result["p50_ms"]:7.2f}ms  '
+            f'p95 {result["p95_ms"]:7.2f}ms  p99 {result["p99_ms"]:7.2f}ms'
+            + (f'  {result["errors"]} errors' if result['errors'] else '')
+        )
+    print(f'done in {run["elapsed"]:.1f}s, p99 behind schedule {run["behind_schedule_p99_ms"]:.1f}ms')
+    if run['skipped']:
+        print('not replayable: ' + ', '.join(f'{key} ({count})' for key, count in run['skipped'].items()))
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'recordings': args.recordings,
+            'interactions': len(entries),
+            'speed': args.speed,
+            'concurrency': args.concurrency,
+        },
+        **run,
+    }
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(results, json.load(fp))
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,39 +1,99 @@
-from typing import Dict, Mapping
+from typing import Any, Dict, Mapping, Optional, Set
+import asyncio
 import aiohttp
+import sys
+import time
 import traceback
 
 from disnake.ext import commands
 import disnake
 
-from cogs.utils import db
-from cogs.utils.send import safe_send_prepare
+import config
+from cogs.utils import autodefer, db, offload
+from cogs.utils.admission import AdmissionController, BUSY_MESSAGE
+from cogs.utils.autodefer import AutoDeferrer
+from cogs.utils.cache_profile import get_profile
+from cogs.utils.error_reports import ErrorReporter
+from cogs.utils.looplag import LoopMonitor
+from cogs.utils.metrics import Metrics, interaction_command_name
+from cogs.utils.recorder import InteractionRecorder
+from cogs.utils.roles import RoleQueues
+from cogs.utils.shards import ShardMonitor
+from cogs.utils.slowlog import SlowQueryLog
+from cogs.utils.views import dispatch_persistent
 
 initial_extensions = (
     'cogs.tags',  # cogs
     'cogs.guild_features',
     'cogs.snippets',
     'cogs.meta',
+    'cogs.reminder',
+    'cogs.stats',
+    'cogs.backup',
+    'cogs.debug',
     'jishaku',  # community extensions
 )
 SLASH_COMMAND_GUILDS = (
     859290967475879966,  # m1raynee's test
     808030843078836254,  # disnake
 )
+# sharding is opt-in, shard_count and shard_ids split the shards between processes
+SHARDED = config.values.sharded == '1'
+SHARD_COUNT = config.values.shard_count and int(config.values.shard_count)
+SHARD_IDS = config.values.shard_ids and [int(i) for i in config.values.shard_ids.split(',')]
+
+def shard_kwargs() -> Dict[str, Any]:
+    if not SHARDED:
+        return {}
+    if SHARD_IDS and not SHARD_COUNT:
+        raise ValueError('shard_ids requires shard_count to be set')
+    return {'shard_count': SHARD_COUNT or None, 'shard_ids': SHARD_IDS or None}
+
 # async def get_prefix(bot: 'DisnakeHelper', message): 
 #     r = commands.when_mentioned(bot, message)
 #     if message.channel.id in bot.dev_channel_ids and (message.author == bot.owner or message.author in bot.owners):
 #         r.append('')
 #     return r
 
-class DisnakeHelper(commands.Bot):
+class DisnakeHelper(commands.AutoShardedBot if SHARDED else commands.Bot):
     def __init__(self):
+        self.cache_profile = get_profile(config.values.cache_profile, max_messages=config.values.max_messages)
         super().__init__(
             command_prefix=commands.when_mentioned_or('?'),
-            intents=disnake.Intents.all(),
             test_guilds=SLASH_COMMAND_GUILDS,
+            **self.cache_profile.bot_kwargs(),
+            **shard_kwargs()
         )
         self.startup = disnake.utils.utcnow()
         self.defer_pool: Mapping[int, disnake.Interaction] = {}
+        self.metrics = Metrics()
+        db.query_observers.append(self.metrics.on_query)
+        offload.offload_observers.append(self.metrics.on_offload)
+        slow_query_ms = config.values.slow_query_ms
+        self.slow_queries = SlowQueryLog(
+            self,
+            threshold=slow_query_ms and float(slow_query_ms) / 1000,
+            explain=config.values.slow_query_explain != '0'
+        )
+        db.query_observers.append(self.slow_queries)
+        budget = config.values.auto_defer_budget
+        self.auto_defer = AutoDeferrer(self, budget=budget and float(budget))
+        self.role_queues = RoleQueues(self)
+        self.shard_monitor = ShardMonitor(self)
+        lag_threshold = config.values.loop_lag_threshold_ms
+        self.loop_monitor = LoopMonitor(
+            self,
+            threshold=lag_threshold and float(lag_threshold) / 1000,
+            debug=config.values.loop_debug == '1'
+        )
+        self.admission = AdmissionController(self)
+        self.recorder = InteractionRecorder(
+            self,
+            enabled=config.values.record_interactions == '1',
+            salt=config.values.record_salt
+        )
+        window = config.values.error_digest_window
+        self.error_reporter = ErrorReporter(self, window=window and float(window))
 
         for ext in initial_extensions:
             try:
@@ -43,41 +103,129 @@ class DisnakeHelper(commands.Bot):
                 print(f'Could not load extension {ext} due to {e.__class__.__name__}: {e}')
                 print(tb)
         
-        self.loop.run_until_complete(db.init())
-        self.http_session = aiohttp.ClientSession(loop=self.loop)
+        self._db_ready = asyncio.Event()
+        self._db_task: Optional[asyncio.Task] = None
+        self._db_error: Optional[BaseException] = None
+        self._chunking: Set[int] = set()
+        self.http_session = aiohttp.ClientSession(loop=self.loop, trace_configs=[self.metrics.trace_config()])
 
         self._requesters: Dict[disnake.Thread, disnake.Member] = {}
         self._is_being_closing: Dict[disnake.Thread, disnake.Member] = {}
 
+    async def _init_db(self) -> None:
+        start = time.perf_counter()
+        try:
+            await db.init()
+        except Exception as e:
+            # waiters are woken up with the error instead of blocking forever
+            self._db_error = e
+            print('Could not initialise the database:')
+            traceback.print_exc()
+        else:
+            print(f'Database ready in {time.perf_counter() - start:.3f}s')
+        finally:
+            self._db_ready.set()
+
+    async def wait_until_db_ready(self) -> None:
+        await self._db_ready.wait()
+        if self._db_error is not None:
+            raise RuntimeError('Database is not available') from self._db_error
+
+    async def start(self, *args, **kwargs) -> None:
+        if config.values.metrics_port:
+            await self.metrics.start_server(int(config.values.metrics_port))
+        # the DB is initialised while the gateway connects
+        self._db_task = self.loop.create_task(self._init_db())
+        self.error_reporter.start()
+        self.shard_monitor.start()
+        self.loop_monitor.start()
+        self.recorder.start()
+        await super().start(*args, **kwargs)
+
+    async def close(self) -> None:
+        if self._db_task is not None:
+            self._db_task.cancel()
+        self.role_queues.close()
+        self.error_reporter.close()
+        self.shard_monitor.close()
+        self.loop_monitor.close()
+        await self.recorder.close()
+        await self.metrics.close()
+        await self.http_session.close()
+        offload.shutdown()
+        await super().close()
+
+    @property
+    def is_primary(self) -> bool:
+        """Whether this process runs shard 0. Jobs which must run once per bot, not per process, run only there."""
+        shard_ids = getattr(self, 'shard_ids', None)
+        if shard_ids is None:
+            return not self.shard_id
+        return 0 in shard_ids
+
     async def on_ready(self):
         print(f'Logged on as {self.user} (ID: {self.user.id})')
+        if SHARDED:
+            print(f'Running shards {sorted(self.shards)} of {self.shard_count}')
+
+    def maybe_chunk(self, guild: Optional[disnake.Guild]) -> None:
+        if not (self.cache_profile.lazy_chunk and guild) or guild.chunked or guild.id in self._chunking:
+            return
+
+        async def chunk():
+            try:
+                await guild.chunk()
+            finally:
+                self._chunking.discard(guild.id)
+
+        self._chunking.add(guild.id)
+        self.loop.create_task(chunk())
+
+    async def process_application_commands(self, interaction: disnake.ApplicationCommandInteraction) -> None:
+        self.maybe_chunk(interaction.guild)
+        name = interaction_command_name(interaction)
+        if self.admission.try_acquire(name) is not None:
+            return await interaction.response.send_message(BUSY_MESSAGE, ephemeral=True)
+        try:
+            with self.metrics.track_interaction('slash_command', name), self.auto_defer.watch(interaction), \
+                    self.recorder.track('slash_command', interaction, name):
+                await self.wait_until_db_ready()
+                await super().process_application_commands(interaction)
+        finally:
+            self.admission.release(name)
+
+    async def process_app_command_autocompletion(self, interaction: disnake.ApplicationCommandInteraction) -> None:
+        name = interaction_command_name(interaction)
+        if self.admission.try_optional(name) is not None:
+            return await interaction.response.autocomplete(choices=[])
+        with self.metrics.track_interaction('autocomplete', name), self.recorder.track('autocomplete', interaction, name):
+            await self.wait_until_db_ready()
+            await super().process_app_command_autocompletion(interaction)
+
+    async def on_message_interaction(self, interaction: disnake.MessageInteraction):
+        with self.recorder.track('component', interaction, self.recorder.component_command(interaction)):
+            await dispatch_persistent(interaction)
 
     
     async def on_slash_command_error(self, interaction: disnake.ApplicationCommandInteraction, exception: commands.CommandError) -> None:
+        # before any await, the recorder buffers the entry on the next loop iteration
+        self.recorder.mark_error(interaction)
         exception = getattr(exception, 'original', exception)
         if isinstance(exception, (RuntimeError, commands.CheckFailure)):
-            return await interaction.send(exception, ephemeral=True)
+            return await autodefer.send(interaction, exception, ephemeral=True)
 
         content = f'Unknown error happen. Contact m1raynee. Error timestamp: {disnake.utils.utcnow().timestamp()}'
-        await interaction.send(content, ephemeral=True)
-        tb = '\n'.join(traceback.format_exception(type(exception), exception, exception.__traceback__))
-        await self.owner.send((
-            '```py\n'
+        await autodefer.send(interaction, content, ephemeral=True)
+        self.error_reporter.report(exception, (
             f'user = {interaction.user}\n'
             f'channel.id = {interaction.channel.id}\n'
             f'qualified_name = {interaction.application_command.qualified_name}\n'
-            f'options = {interaction.options}\n'
-            '```'
+            f'options = {interaction.options}'
         ))
-        await self.owner.send(**(await safe_send_prepare(f'```py\n{tb}\n```')))
 
     async def on_error(self, event_method: str, *args, **kwargs) -> None:
-        await self.owner.send((
-                '```py\n'
-                f'{event_method = }\n'
-                f'{args = }\n'
-                f'{kwargs = }\n'
-                '```'
-            ))
-        tb = traceback.format_exc()
-        await self.owner.send(**(await safe_send_prepare(f'```py\n{tb}\n```')))
+        self.error_reporter.report(sys.exc_info()[1], (
+            f'{event_method = }\n'
+            f'{args = }\n'
+            f'{kwargs = }'
+        ))
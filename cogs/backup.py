@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+import traceback
+from typing import TYPE_CHECKING
+
+from disnake.ext import commands, tasks
+
+import config
+from .utils import db
+from .utils.backup import backup
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+BACKUP_DIR = config.values.backup_dir or 'data/backups'
+BACKUP_INTERVAL = float(config.values.backup_interval or 24)  # hours
+BACKUP_KEEP = int(config.values.backup_keep or 7)
+
+class Backup(commands.Cog):
+    """Periodic online backups of the SQLite database."""
+
+    def __init__(self, bot: DisnakeHelper):
+        self.bot = bot
+        self.last_snapshot = None
+        # with shards split between processes only one of them makes backups
+        if not db.IS_POSTGRES and bot.is_primary:
+            self.backup_loop.start()
+
+    def cog_unload(self):
+        self.backup_loop.cancel()
+
+    async def run_backup(self) -> str:
+        source = db.master_connection()['credentials']['file_path']
+        start = time.perf_counter()
+        snapshot = await backup(source, BACKUP_DIR, keep=BACKUP_KEEP)
+        self.bot.metrics.observe('db_backup_seconds', time.perf_counter() - start)
+        self.last_snapshot = snapshot
+        return snapshot
+
+    @tasks.loop(hours=BACKUP_INTERVAL)
+    async def backup_loop(self):
+        try:
+            await self.run_backup()
+        except Exception:
+            traceback.print_exc()
+
+    @backup_loop.before_loop
+    async def before_backup_loop(self):
+        await self.bot.wait_until_ready()
+        await self.bot.wait_until_db_ready()
+
+def setup(bot):
+    bot.add_cog(Backup(bot))
@@ -0,0 +1,155 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from disnake import ApplicationCommandInteraction
+from disnake.ext import commands
+
+from .utils import db
+from .utils.autodefer import ephemeral_defer
+from .utils.send import safe_send_prepare
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+def format_ms(seconds: float) -> str:
+    return f'{seconds * 1000:.0f}ms' if seconds != float('inf') else 'inf'
+
+class Debug(commands.Cog):
+    """Owner-only insight into the bot internals"""
+
+    def __init__(self, bot: DisnakeHelper):
+        self.bot = bot
+
+    async def cog_slash_command_check(self, inter: ApplicationCommandInteraction) -> bool:
+        if not await self.bot.is_owner(inter.author):
+            raise commands.NotOwner('You do not own this bot.')
+        return True
+
+    @commands.slash_command()
+    async def debug(*_):
+        pass
+
+    @debug.sub_command(name='stats')
+    @ephemeral_defer
+    async def debug_stats(self, inter: ApplicationCommandInteraction):
+        """Shows latency, DB and HTTP statistics per command."""
+        metrics = self.bot.metrics
+        auto_defer = self.bot.auto_defer.stats()
+        lines = [f'{"command":<24} {"count":>6} {"p50":>7} {"p95":>7} {"p99":>7} {"db q":>5} {"db":>7} {"defer":>5}']
+
+        for kind in ('slash_command', 'autocomplete'):
+            series = metrics.histograms.get(f'{kind}_latency_seconds', {})
+            if not series:
+                continue
+            lines.append(f'-- {kind.replace("_", " ")}')
+            for labels, latency in sorted(series.items(), key=lambda i: -i[1].count):
+                command = dict(labels)['command']
+                queries = metrics.histogram(f'{kind}_db_queries', command=command)
+                db_time = metrics.histogram(f'{kind}_db_seconds', command=command)
+                deferred = auto_defer.get(command, (0, 0))[1] if kind == 'slash_command' else 0
+                lines.append(
+                    f'{command[:24]:<24} {latency.count:>6} '
+                    f'{format_ms(latency.quantile(.5)):>7} {format_ms(latency.quantile(.95)):>7} '
+                    f'{format_ms(latency.quantile(.99)):>7} '
+                    f'{queries.sum / queries.count:>5.1f} {format_ms(db_time.sum / db_time.count):>7} '
+                    f'{deferred:>5}'
+                )
+
+        http = metrics.histograms.get('http_request_seconds', {})
+        if http:
+            lines.append('-- http')
+            for labels, histogram in sorted(http.items(), key=lambda i: -i[1].count):
+                labels = dict(labels)
+                lines.append(
+                    f'{labels["host"][:20]:<20} {labels["status"]:>3} {histogram.count:>6} '
+                    f'{format_ms(histogram.quantile(.5)):>7} {format_ms(histogram.quantile(.95)):>7} '
+                    f'{format_ms(histogram.quantile(.99)):>7}'
+                )
+
+        lines.append('-- shards')
+        for shard in self.bot.shard_monitor.health():
+            lines.append(
+                f'{shard.shard_id:<6} {format_ms(shard.latency):>7} {shard.events_per_second:>7.1f}/s '
+                f'reconnects {shard.reconnects}, resumes {shard.resumes}, disconnects {shard.disconnects}'
+            )
+
+        admission = self.bot.admission
+        lines.append(f'-- admission, pressure {admission.pressure():.2f}, db queue {db.queue_depth()}')
+        for command in sorted({*admission.running, *admission.shed}):
+            lines.append(f'{command[:24]:<24} running {admission.running[command]:>3}, shed {admission.shed[command]}')
+
+        depths = self.bot.role_queues.depths()
+        if depths:
+            lines.append('-- role queues')
+            lines.extend(f'{guild_id:<20} {depth:>6}' for guild_id, depth in depths.items())
+
+        content = '```\n' + '\n'.join(lines) + '\n```'
+        await inter.response.send_message(**(await safe_send_prepare(content)), ephemeral=True)
+
+    @debug.sub_command(name='queries')
+    @ephemeral_defer
+    async def debug_queries(self, inter: ApplicationCommandInteraction, count: int = commands.param(10, ge=1, le=25)):
+        """
+        Shows the most expensive query shapes.
+        Parameters
+        ----------
+        count: How many query shapes to show
+        """
+        slow_queries = self.bot.slow_queries
+        blocks = []
+        for shape in slow_queries.top(count):
+            block = (
+                f'total {format_ms(shape.total)}, {shape.count} calls, '
+                f'avg {format_ms(shape.total / shape.count)}, max {format_ms(shape.max)}, '
+                f'{shape.slow} slow'
+            )
+            if shape.last_source:
+                block += f' (last from {shape.last_source})'
+            block += f'\n{shape.sql}'
+            if shape.plan:
+                block += f'\n{shape.plan}'
+            blocks.append(block)
+
+        content = (
+            f'Slow query threshold: {format_ms(slow_queries.threshold)}\n'
+            '```sql\n' + ('\n\n'.join(blocks) or 'No queries were made yet.') + '\n```'
+        )
+        await inter.response.send_message(**(await safe_send_prepare(content)), ephemeral=True)
+
+    @debug.sub_command(name='loop')
+    @ephemeral_defer
+    async def debug_loop(self, inter: ApplicationCommandInteraction, count: int = commands.param(5, ge=1, le=10)):
+        """
+        Shows event loop lag and what blocked the loop.
+        Parameters
+        ----------
+        count: How many offenders to show
+        """
+        monitor = self.bot.loop_monitor
+        lag = monitor.stats()
+        blocks = [
+            f'{offender.count} times, total {format_ms(offender.total)}, max {format_ms(offender.max)}\n{offender.key}'
+            for offender in monitor.top(count)
+        ]
+        content = (
+            f'Loop lag p50 {format_ms(lag["p50"])}, p95 {format_ms(lag["p95"])}, '
+            f'p99 {format_ms(lag["p99"])}, max {format_ms(lag["max"])} '
+            f'(threshold {format_ms(monitor.threshold)}, slow callback detection {"on" if monitor.debug else "off"})\n'
+            '```py\n' + ('\n\n'.join(blocks) or 'Nothing blocked the loop yet.') + '\n```'
+        )
+        await inter.response.send_message(**(await safe_send_prepare(content)), ephemeral=True)
+
+    @debug.sub_command(name='backup')
+    @ephemeral_defer
+    async def debug_backup(self, inter: ApplicationCommandInteraction):
+        """Makes a database backup right now."""
+        cog = self.bot.get_cog('Backup')
+        if cog is None or db.IS_POSTGRES:
+            return await inter.response.send_message('Backups are not available.', ephemeral=True)
+
+        await inter.response.defer(ephemeral=True)
+        snapshot = await cog.run_backup()
+        await inter.followup.send(f'Backup saved to `{snapshot}`.', ephemeral=True)
+
+def setup(bot):
+    bot.add_cog(Debug(bot))
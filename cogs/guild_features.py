@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Optional
 
 from disnake.ext import commands
 from disnake.utils import oauth_url
@@ -14,8 +14,15 @@ from disnake import (
 )
 import disnake
 
-from .utils.emojis import choice_marks
-from .utils.views import Confirm
+from .utils.db.addbot import AddBotRequest
+from .utils.emojis import accept_mark, deny_mark, choice_marks
+from .utils.views import (
+    Confirm,
+    ComponentState,
+    author_check,
+    make_custom_id,
+    persistent_handler
+)
 from .utils.converters import UserCondition
 
 if TYPE_CHECKING:
@@ -38,52 +45,57 @@ options = {
     )
 }
 
-class NotificationsView(disnake.ui.View):
-    def __init__(self, *, member: disnake.Member):
-        super().__init__(timeout=60)
-
-        options = [
-            disnake.SelectOption(
-                label='Updates', value=str(UPDATES_ROLE),
-                description='Disnake library updates', default=False
-            ),
-            disnake.SelectOption(
-                label='News', value=str(NEWS_ROLE),
-                description='Community and library news', default=False
-            )
-        ]
-        for opt in options:
-            if int(opt.value) in member._roles:
-                opt.default = True
-        self.select_role.options = options
-    
-    @disnake.ui.select(
+def notifications_select(member: disnake.Member) -> disnake.ui.Select:
+    options = [
+        disnake.SelectOption(
+            label='Updates', value=str(UPDATES_ROLE),
+            description='Disnake library updates', default=False
+        ),
+        disnake.SelectOption(
+            label='News', value=str(NEWS_ROLE),
+            description='Community and library news', default=False
+        )
+    ]
+    for opt in options:
+        if int(opt.value) in member._roles:
+            opt.default = True
+    return disnake.ui.Select(
         placeholder='Select roles',
-        custom_id='feats:select-role',
-        min_values=0, max_values=2
+        custom_id=make_custom_id('feats:select-role', member.id),
+        min_values=0, max_values=2,
+        options=options
+    )
+
+@persistent_handler('feats:select-role')
+async def select_role(interaction: disnake.MessageInteraction, state: ComponentState):
+    if not await author_check(interaction, state):
+        return
+    values = interaction.values or []
+    selected = {int(value) for value in values} & {UPDATES_ROLE, NEWS_ROLE}
+    interaction.bot.role_queues.get(interaction.guild_id).enqueue(
+        interaction.author.id,
+        add=selected,
+        remove={UPDATES_ROLE, NEWS_ROLE} - selected
+    )
+
+    if values:
+        r = ', '.join([f'<@&{i}>' for i in values])
+    else:
+        r = '(nothing)'
+    # the change is queued, it is applied within a few seconds
+    await interaction.response.edit_message(
+        content=f'Your roles will be updated to: {r}',
+        components=[]
     )
-    async def select_role(self, select: disnake.ui.Select, interaction: disnake.MessageInteraction):
-        roles = [disnake.Object(role_id) for role_id in interaction.author._roles if role_id not in (UPDATES_ROLE, NEWS_ROLE)]
-        for value in select.values:
-            if int(value) in (UPDATES_ROLE, NEWS_ROLE):
-                roles.append(disnake.Object(int(value)))
-        await interaction.author.edit(roles=roles)
-
-        if select.values:
-            r = ', '.join([f'<@&{i}>' for i in select.values])
-        else:
-            r = '(nothing)'
-        await interaction.response.edit_message(
-            content=f'Now you have these roles: {r}',
-            view=None
-        )
-        self.stop()
 
 class Disnake(commands.Cog, name='disnake'):
     """Docs and other disnake's guild things."""
 
     def __init__(self, bot: DisnakeHelper):
         self.bot = bot
+        # pending addbot requests by message id, ``None`` until loaded
+        self._pending: Optional[Dict[int, AddBotRequest]] = None
+        bot.loop.create_task(self._load_pending())
 
     @commands.slash_command()
     async def addbot(
@@ -102,11 +114,11 @@ class Disnake(commands.Cog, name='disnake'):
         bot: User = bot_id
 
 
-        view = Confirm(author_id=inter.author.id)
+        view = Confirm(author_id=inter.author.id, nonce=inter.id)
         await inter.response.send_message(
             f'You\'re going to add {bot} on this server.\n'
             'To agree, please press "Confirm" button',
-            view = view
+            components = view.components
         )
         v = await view.start()
 
@@ -116,7 +128,7 @@ class Disnake(commands.Cog, name='disnake'):
             content = 'You will get a DM regarding the status of your bot, so make sure you have them on.'
         else:
             content = 'Canceled'
-        await inter.edit_original_message(content=content, view=None)
+        await inter.edit_original_message(content=content, components=[])
         if not v:
             return
 
@@ -133,9 +145,28 @@ class Disnake(commands.Cog, name='disnake'):
         e.add_field(name='Author ID', value=inter.author.id)
 
         msg = await self.bot.get_partial_messageable(DISNAKE_ADDBOT_CHANNEL).send(embed=e)
+        request = await AddBotRequest.create(
+            message_id=msg.id,
+            bot_id=bot.id,
+            requester_id=inter.author.id,
+            embed=e.to_dict()
+        )
+        if self._pending is not None:
+            self._pending[msg.id] = request
         for r in choice_marks:
             await msg.add_reaction(r)
 
+    async def _load_pending(self):
+        await self.bot.wait_until_db_ready()
+        rows = await AddBotRequest.filter(status='pending')
+        self._pending = {row.message_id: row for row in rows}
+
+    async def get_pending_request(self, message_id: int) -> Optional[AddBotRequest]:
+        if self._pending is not None:
+            return self._pending.get(message_id)
+        await self.bot.wait_until_db_ready()
+        return await AddBotRequest.filter(message_id=message_id, status='pending').first()
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: RawReactionActionEvent):
         if payload.channel_id != DISNAKE_ADDBOT_CHANNEL:
@@ -144,20 +175,31 @@ class Disnake(commands.Cog, name='disnake'):
             return
         if payload.user_id == self.bot.user.id:
             return
+        if payload.emoji.id not in (accept_mark.id, deny_mark.id):
+            return
 
-        message = await self.bot.get_channel(DISNAKE_ADDBOT_CHANNEL).fetch_message(payload.message_id)
-        if message.author.id != self.bot.user.id:
+        request = await self.get_pending_request(payload.message_id)
+        if request is None:
             return
+        if self._pending is not None:
+            # any other reaction on this request is ignored while it's handled
+            self._pending.pop(payload.message_id, None)
+
+        accepted = payload.emoji.id == accept_mark.id
+        status = 'accepted' if accepted else 'rejected'
+        try:
+            updated = await (AddBotRequest
+                .filter(message_id=request.message_id, status='pending')
+                .update(status=status, handled_by=payload.user_id)
+            )
+            if not updated:
+                return
 
-        if (
-            payload.emoji.id in (892770746013724683, 892770746034704384)
-            and len(message.embeds) != 0
-            and (embed := message.embeds[0]).colour == Colour.orange()
-        ):
+            embed = Embed.from_dict(request.embed)
             embed.add_field(name='Responding admin', value=f'<@{payload.user_id}>')
-            bot_id = int(embed.fields[2].value)
-            member_id = int(embed.fields[3].value)
-            if payload.emoji.id == 892770746013724683:
+            bot_id = request.bot_id
+            member_id = request.requester_id
+            if accepted:
                 embed.colour = Colour.green()
                 user_content = f'Your bot <@{bot_id}> was invited to disnake server.'
                 add_content = f'<@{member_id}> will be aware about adding a bot.'
@@ -165,10 +207,24 @@ class Disnake(commands.Cog, name='disnake'):
                 embed.colour = Colour.red()
                 user_content = f'<@{bot_id}>\'s invitation was rejected.'
                 add_content = f'<@{member_id}> will be aware about rejecting a bot.'
-            await message.edit(content=add_content, embed=embed)
-            await message.clear_reactions()
-
-            await (await self.bot.get_or_fetch_user(member_id)).send(user_content)
+            message = self.bot.get_partial_messageable(DISNAKE_ADDBOT_CHANNEL).get_partial_message(request.message_id)
+            try:
+                await message.edit(content=add_content, embed=embed)
+            except Exception:
+                # the request is still shown as pending, so it has to stay pending
+                await (AddBotRequest
+                    .filter(message_id=request.message_id, status=status)
+                    .update(status='pending', handled_by=None)
+                )
+                raise
+        except Exception:
+            # another reaction can handle it again
+            if self._pending is not None:
+                self._pending[payload.message_id] = request
+            raise
+        await message.clear_reactions()
+
+        await (await self.bot.get_or_fetch_user(member_id)).send(user_content)
     
     @commands.Cog.listener()
     async def on_member_join(self, member: Member):
@@ -177,22 +233,17 @@ class Disnake(commands.Cog, name='disnake'):
         if not member.bot:
             return
 
-        await member.add_roles(Object(DISNAKE_BOT_ROLE))
+        self.bot.role_queues.get(member.guild.id).enqueue(member.id, add=(DISNAKE_BOT_ROLE,))
     
     @commands.slash_command()
     async def notifications(self, inter: ApplicationCommandInteraction):
         """Edit your notifications roles"""
 
-        view = NotificationsView(member=inter.author)
-
         await inter.send(
             'Choose which notification roles you want to get',
-            view=view, ephemeral=True
+            components=[notifications_select(inter.author)], ephemeral=True
         )
 
-        if await view.wait():
-            await inter.edit_original_message(content='You\'re too slow.', view=None)
-
 
 def setup(bot):
     bot.add_cog(Disnake(bot))
@@ -1,8 +1,13 @@
 import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Tuple
 
 from disnake import ApplicationCommandInteraction
 from disnake.ext import commands
 
+from .utils.unicode_index import get_index
+
 def to_string(c, *, for_autocomp=False):
     digit = f'{ord(c):x}'
     name = unicodedata.name(c, 'Name not found.')
@@ -12,12 +17,37 @@ def to_string(c, *, for_autocomp=False):
         r += f' \N{EM DASH} <http://www.fileformat.info/info/unicode/char/{digit}>'
     return r
 
+@lru_cache(maxsize=4096)
+def autocomp_line(c):
+    return to_string(c, for_autocomp=True)
+
+# last input and its lines per user, autocomplete input mostly grows by one character
+_last_lines: 'OrderedDict[int, Tuple[str, List[str]]]' = OrderedDict()
+LAST_LINES_SIZE = 1024
+
+def charinfo_lines(user_id: int, value: str) -> List[str]:
+    last = _last_lines.get(user_id)
+    if last is not None and value.startswith(last[0]):
+        lines = last[1] + [autocomp_line(c) for c in value[len(last[0]):]]
+    else:
+        lines = [autocomp_line(c) for c in value]
+
+    _last_lines[user_id] = (value, lines)
+    _last_lines.move_to_end(user_id)
+    if len(_last_lines) > LAST_LINES_SIZE:
+        _last_lines.popitem(last=False)
+    return lines
+
 async def charinfo_autocomp(inter, value):
     if len(value) > 25:
         return {'Only up to 25 characters at a time.': ''}
+    return dict.fromkeys(charinfo_lines(inter.author.id, value), value)
+
+async def charsearch_autocomp(inter, value):
+    index = await get_index()
     return {
-        to_string(c, for_autocomp=True): value
-        for c in value
+        f'{c} {name}'[:100]: c
+        for name, c in index.search(value)
     }
 
 class Meta(commands.Cog):
@@ -43,7 +73,29 @@ class Meta(commands.Cog):
         if len(msg) > 2000:
             return await inter.response.send_message('Output too long to display.', ephemeral=True)
         await inter.response.send_message(msg, ephemeral=True)
-        
+
+    @commands.slash_command()
+    async def charsearch(self, inter: ApplicationCommandInteraction,
+        query: str = commands.Param(autocomplete=charsearch_autocomp)
+    ):
+        """
+        Searches for characters by their Unicode name.
+        Parameters
+        ----------
+        query: Character name or a part of it, e.g. "right arrow"
+        """
+        index = await get_index()
+        if len(query) == 1:
+            # picked from the autocomplete
+            chars = query
+        else:
+            chars = ''.join(c for _, c in index.search(query, limit=10))
+        if not chars:
+            return await inter.response.send_message('Nothing found.', ephemeral=True)
+
+        msg = '\n'.join(map(to_string, chars))
+        await inter.response.send_message(msg[:2000], ephemeral=True)
+
 
 def setup(bot):
     bot.add_cog(Meta(bot))
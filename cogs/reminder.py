@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import heapq
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from disnake import ApplicationCommandInteraction, Embed
+from disnake.ext import commands
+
+from .utils.db.remind import Reminders
+from .utils.converters import FutureTime, futuretime_autocomp
+from .utils.time import format_relative
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+# how many upcoming timers are kept in memory at once
+WINDOW_SIZE = 256
+# event loop timers misbehave with very long delays
+MAX_SLEEP = 60 * 60 * 24 * 30
+
+def _naive(dt: datetime.datetime) -> datetime.datetime:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return dt
+
+class Reminder(commands.Cog):
+    """Reminders to do something."""
+
+    def __init__(self, bot: DisnakeHelper):
+        self.bot = bot
+        # (expires, id, row) of the earliest timers only
+        self._heap: List[Tuple[datetime.datetime, int, Reminders]] = []
+        # expiry of the latest loaded timer, ``None`` if every timer in DB is loaded
+        self._window_end: Optional[datetime.datetime] = None
+        self._loaded = False
+        # timers created before the first refill finished, it may have missed them
+        self._early: List[Reminders] = []
+        self._wakeup = asyncio.Event()
+        self._task = bot.loop.create_task(self.dispatch_timers())
+
+    def cog_unload(self):
+        self._task.cancel()
+
+    async def _refill(self):
+        rows = await (Reminders
+            .all()
+            .order_by('expires', 'id')
+            .limit(WINDOW_SIZE)
+        )
+        known = {entry[1] for entry in self._heap}
+        for row in rows:
+            if row.id not in known:
+                heapq.heappush(self._heap, (_naive(row.expires), row.id, row))
+
+        self._window_end = _naive(rows[-1].expires) if len(rows) == WINDOW_SIZE else None
+        if not self._loaded:
+            self._loaded = True
+            known.update(row.id for row in rows)
+            early, self._early = self._early, []
+            for row in early:
+                if row.id not in known:
+                    self._push(row)
+
+    def _push(self, row: Reminders):
+        expires = _naive(row.expires)
+        if not self._loaded:
+            # the first refill loads it, or adds it if its query missed it
+            self._early.append(row)
+            return
+        if self._window_end is not None and expires > self._window_end:
+            # beyond the loaded window, DB will give it back in order later
+            return
+
+        was_earliest = not self._heap or (expires, row.id) < self._heap[0][:2]
+        heapq.heappush(self._heap, (expires, row.id, row))
+        if len(self._heap) > WINDOW_SIZE * 2:
+            self._heap = heapq.nsmallest(WINDOW_SIZE, self._heap)
+            self._window_end = self._heap[-1][0]
+        if was_earliest:
+            self._wakeup.set()
+
+    async def dispatch_timers(self):
+        await self.bot.wait_until_ready()
+        await self.bot.wait_until_db_ready()
+        while not self.bot.is_closed():
+            if not self._heap:
+                await self._refill()
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            expires, _, row = self._heap[0]
+            delay = (expires - datetime.datetime.utcnow()).total_seconds()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            await self.call_timer(row)
+
+    async def call_timer(self, timer: Reminders):
+        # a timer which was deleted in the meantime is not dispatched
+        if await Reminders.filter(id=timer.id).delete():
+            self.bot.dispatch(f'{timer.event}_timer_complete', timer)
+
+    async def create_timer(self, when: datetime.datetime, event: str, author_id: int, **extra) -> Reminders:
+        timer = await Reminders.create(
+            expires=_naive(when),
+            event=event,
+            author_id=author_id,
+            extra=extra
+        )
+        self._push(timer)
+        return timer
+
+    @commands.slash_command()
+    async def remind(*_):
+        pass
+
+    @remind.sub_command(name='me')
+    async def remind_me(
+        self,
+        inter: ApplicationCommandInteraction,
+        when: FutureTime = commands.param(converter=FutureTime.convert, autocomp=futuretime_autocomp),
+        text: str = commands.param('...')
+    ):
+        """
+        Reminds you of something after a certain amount of time.
+        Parameters
+        ----------
+        when: When you want to be reminded, e.g. "in 2 hours" or "tomorrow"
+        text: What you want to be reminded of
+        """
+        timer = await self.create_timer(
+            when.dt, 'reminder', inter.author.id,
+            channel_id=inter.channel_id, text=text[:1500]
+        )
+        await inter.response.send_message(
+            f'Alright, {format_relative(when.dt.replace(tzinfo=datetime.timezone.utc))}: {text[:1500]} (ID: {timer.id})'
+        )
+
+    @remind.sub_command(name='list')
+    async def remind_list(self, inter: ApplicationCommandInteraction):
+        """Shows your upcoming reminders."""
+        rows = await (Reminders
+            .filter(author_id=inter.author.id, event='reminder')
+            .order_by('expires')
+            .limit(10)
+        )
+        e = Embed(title='Reminders', color=0x0084c7)
+        e.description = '\n'.join(
+            f'{row.id}. {format_relative(_naive(row.expires).replace(tzinfo=datetime.timezone.utc))}: {row.extra.get("text", "...")[:100]}'
+            for row in rows
+        ) or 'No reminders.'
+        await inter.response.send_message(embed=e, ephemeral=True)
+
+    @remind.sub_command(name='delete')
+    async def remind_delete(self, inter: ApplicationCommandInteraction, id: int):
+        """
+        Deletes your reminder.
+        Parameters
+        ----------
+        id: Reminder ID
+        """
+        deleted = await Reminders.filter(id=id, author_id=inter.author.id, event='reminder').delete()
+        if not deleted:
+            return await inter.response.send_message('Could not delete any reminders with that ID.', ephemeral=True)
+        await inter.response.send_message('Successfully deleted reminder.', ephemeral=True)
+
+    @commands.Cog.listener()
+    async def on_reminder_timer_complete(self, timer: Reminders):
+        channel = self.bot.get_partial_messageable(timer.extra['channel_id'])
+        await channel.send(f'<@{timer.author_id}>, {format_relative(_naive(timer.created).replace(tzinfo=datetime.timezone.utc))}: {timer.extra["text"]}')
+
+def setup(bot):
+    bot.add_cog(Reminder(bot))
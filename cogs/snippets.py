@@ -12,6 +12,7 @@ from disnake import (
 from disnake.ext import commands
 from aiohttp import ClientResponseError
 
+from .utils.offload import offload
 from .utils.send import wait_for_deletion
 
 GITHUB_RE = re.compile(
@@ -39,7 +40,8 @@ class Snippets(commands.Cog):
             (GITHUB_GIST_RE, self.fetch_github_gist)
         ]
 
-    def _snippet_to_codeblock(self, file_contents: str, file_path: str, start_line: str, end_line: str) -> str:
+    @staticmethod
+    def _snippet_to_codeblock(file_contents: str, file_path: str, start_line: str, end_line: str) -> str:
         """
         Given the entire file contents and target lines, creates a code block.
         First, we split the file contents into a list of lines and then keep and join only the required
@@ -127,7 +129,10 @@ class Snippets(commands.Cog):
             'text',
             headers=GITHUB_HEADERS,
         )
-        return self._snippet_to_codeblock(file_contents, file_path, start_line, end_line)
+        return await offload(
+            self._snippet_to_codeblock, file_contents, file_path, start_line, end_line,
+            pool='process', size=len(file_contents)
+        )
 
     async def fetch_github_gist(
         self,
@@ -151,7 +156,10 @@ class Snippets(commands.Cog):
                     gist_json['files'][gist_file]['raw_url'],
                     'text',
                 )
-                return self._snippet_to_codeblock(file_contents, gist_file, start_line, end_line)
+                return await offload(
+                    self._snippet_to_codeblock, file_contents, gist_file, start_line, end_line,
+                    pool='process', size=len(file_contents)
+                )
         return ''
 
     async def parse_snippets(self, content: str):
@@ -167,7 +175,15 @@ class Snippets(commands.Cog):
 
     @commands.Cog.listener()
     async def on_message(self, message: Message):
-        snippets = await self.parse_snippets(message.content)
+        if 'github.com/' not in message.content:
+            return
+        # nobody waits for a snippet, skipping it is fine when the bot is busy
+        if self.bot.admission.try_acquire('snippets') is not None:
+            return
+        try:
+            snippets = await self.parse_snippets(message.content)
+        finally:
+            self.bot.admission.release('snippets')
         destination = message.channel
 
         if 0 < len(snippets) <= 2000 and snippets.count('\n') <= 15:
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import datetime
+import traceback
+from collections import Counter, deque
+from typing import TYPE_CHECKING, Deque, Dict, Tuple
+
+from disnake import ApplicationCommandInteraction, Embed, OptionChoice
+from disnake.ext import commands, tasks
+
+from tortoise.expressions import F
+from tortoise.functions import Sum
+from tortoise.transactions import in_transaction
+
+from .utils.db.stats import Commands, CommandsRollup
+from .utils.metrics import interaction_command_name
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+FLUSH_INTERVAL = 30  # seconds
+BUFFER_SIZE = 10_000
+
+WINDOWS = {
+    'day': datetime.timedelta(days=1),
+    'week': datetime.timedelta(days=7),
+    'month': datetime.timedelta(days=30),
+}
+
+def _hour(dt: datetime.datetime) -> datetime.datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+class Stats(commands.Cog):
+    """Bot usage statistics"""
+
+    def __init__(self, bot: DisnakeHelper):
+        self.bot = bot
+        # usage is only appended here, the flush loop writes it in bulk
+        self._buffer: Deque[Commands] = deque(maxlen=BUFFER_SIZE)
+        self.dropped = 0
+        self.flush_loop.start()
+
+    def cog_unload(self):
+        self.flush_loop.stop()
+
+    @commands.Cog.listener()
+    async def on_slash_command(self, inter: ApplicationCommandInteraction):
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(Commands(
+            guild_id=inter.guild_id,
+            channel_id=inter.channel_id,
+            author_id=inter.author.id,
+            used=inter.created_at.replace(tzinfo=None),
+            command=interaction_command_name(inter)
+        ))
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        rows = list(self._buffer)
+        self._buffer.clear()
+
+        rollups: Dict[Tuple[datetime.datetime, str], int] = Counter(
+            (_hour(row.used), row.command) for row in rows
+        )
+        try:
+            async with in_transaction('master') as conn:
+                # bulk_create picks up the transaction's connection by itself
+                await Commands.bulk_create(rows)
+                for (hour, command), count in rollups.items():
+                    updated = await (CommandsRollup
+                        .filter(hour=hour, command=command)
+                        .using_db(conn)
+                        .update(count=F('count') + count)
+                    )
+                    if not updated:
+                        await CommandsRollup.create(hour=hour, command=command, count=count, using_db=conn)
+        except Exception:
+            # keep the rows for the next flush instead of stopping the loop
+            self._buffer.extendleft(reversed(rows))
+            traceback.print_exc()
+
+    @tasks.loop(seconds=FLUSH_INTERVAL)
+    async def flush_loop(self):
+        await self.flush()
+
+    @flush_loop.before_loop
+    async def before_flush_loop(self):
+        await self.bot.wait_until_ready()
+        await self.bot.wait_until_db_ready()
+
+    @flush_loop.after_loop
+    async def after_flush_loop(self):
+        await self.flush()
+
+    @commands.slash_command()
+    async def stats(*_):
+        pass
+
+    @stats.sub_command(name='commands')
+    async def stats_commands(
+        self,
+        inter: ApplicationCommandInteraction,
+        window = commands.param(
+            'day',
+            choices = [
+                OptionChoice('Last 24 hours', 'day'),
+                OptionChoice('Last 7 days', 'week'),
+                OptionChoice('Last 30 days', 'month'),
+                OptionChoice('All time', 'all')
+            ]
+        )
+    ):
+        """
+        Shows the most used commands.
+        Parameters
+        ----------
+        window: Time window to count command uses in
+        """
+        query = CommandsRollup.all()
+        if window in WINDOWS:
+            since = _hour(datetime.datetime.utcnow() - WINDOWS[window])
+            query = query.filter(hour__gte=since)
+        rows = await (query
+            .group_by('command')
+            .annotate(total=Sum('count'))
+            .order_by('-total')
+            .limit(20)
+            .values('command', 'total')
+        )
+
+        # not flushed yet usage is counted too
+        pending = Counter(row.command for row in self._buffer)
+        totals = Counter({row['command']: row['total'] for row in rows})
+        totals.update(pending)
+
+        e = Embed(title='Command usage', color=0x0084c7)
+        e.description = '\n'.join(
+            f'{i}. `/{command}` \N{EM DASH} {count}'
+            for i, (command, count) in enumerate(totals.most_common(20), 1)
+        ) or 'No commands were used yet.'
+        await inter.response.send_message(embed=e)
+
+def setup(bot):
+    bot.add_cog(Stats(bot))
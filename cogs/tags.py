@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import datetime
+import traceback
 from typing import TYPE_CHECKING, Optional, Union, List
 from functools import partial
 from textwrap import shorten
@@ -17,18 +18,20 @@ from disnake import (
     Button,
     OptionChoice
 )
-from disnake.ext import commands
+from disnake.ext import commands, tasks
 from disnake.utils import escape_markdown
 
 from tortoise.exceptions import IntegrityError
 from tortoise.transactions import in_transaction
 from tortoise.expressions import F
 
-from .utils.db.tags import TagTable, TagLookup
+from .utils.db.tags import TagTable, TagLookup, TagTrend, create_alias, search_names
 from .utils.send import safe_send_prepare
 from .utils.converters import tag_name, clean_content
-from .utils import paginator
+from .utils import db, paginator
 from .utils.views import Confirm
+from .utils.reservations import get_reservations
+from .utils.trending import TrendingTags
 if TYPE_CHECKING:
     from tortoise.backends.sqlite.client import TransactionWrapper
     from bot import DisnakeHelper
@@ -124,10 +127,29 @@ class TagCreateView(ui.View):
 
     async def interaction_check(self, interaction: MessageInteraction) -> bool:
         if interaction.author == self._init_interaction.author:
+            if self.name is not None and self._edit is None:
+                # the view is still in use, keep the name reserved
+                if not await self._cog.reserve_tag_name(self.name, interaction.author.id):
+                    await self._name_taken(interaction)
+                    return False
             return True
         await interaction.response.send_message('You\'re not an author of this View.', ephemeral=True)
         return False
 
+    async def _name_taken(self, interaction: MessageInteraction):
+        # the lease expired and someone else reserved the name, it has to be chosen again
+        self.name = None
+        items = list(self.children)
+        self.clear_items()
+        for item in (self.name_button, *items):
+            self.add_item(item)
+        self.unlock_all()
+        await interaction.response.send_message(
+            'Sorry. Someone else is making a tag with this name now, press "Name" to choose another.',
+            ephemeral=True
+        )
+        await self.message.edit(embed=self.prepare_embed(), view=self)
+
     @ui.button(
         label='Name',
         style=ButtonStyle.secondary
@@ -147,7 +169,7 @@ class TagCreateView(ui.View):
         except commands.BadArgument as e:
             content = f'{e}. Press "Name" to retry.'
         else:
-            if self._cog.is_tag_being_made(name):
+            if not await self._cog.reserve_tag_name(name, interaction.author.id):
                 content = 'Sorry. This tag is currently being made by someone.'
             else:
                 rows = await (TagLookup
@@ -156,9 +178,9 @@ class TagCreateView(ui.View):
                 )
                 if not rows:
                     self.name = name
-                    self._cog.add_in_progress_tag(name)
                     self.remove_item(button)
                 else:
+                    await self._cog.release_tag_name(name, interaction.author.id)
                     content = 'Sorry. A tag with that name already exists.'
 
         self.unlock_all()
@@ -177,10 +199,7 @@ class TagCreateView(ui.View):
         if self.is_finished():
             return
 
-        if msg.content:
-            content = clean_content()(interaction, msg.content)
-        else:
-            content = msg.content
+        content = clean_content()(interaction, msg.content)
 
         if msg.attachments:
             content += f'\n{msg.attachments[0].url}'
@@ -218,8 +237,8 @@ class TagCreateView(ui.View):
             child.disabled = True
         await interaction.response.edit_message(view=self)
 
+        # the name stays reserved until the tag is created
         self.last_interaction = interaction
-        self._cog.remove_in_progress_tag(self.name)
         self.stop()
     
     @ui.button(
@@ -227,7 +246,8 @@ class TagCreateView(ui.View):
         style=ButtonStyle.danger
     )
     async def abort_button(self, button: Button, interaction: MessageInteraction):
-        self._cog.remove_in_progress_tag(self.name)
+        if self.name is not None and self._edit is None:
+            await self._cog.release_tag_name(self.name, interaction.author.id)
         await interaction.response.edit_message(
             content=f'Tag {"edi" if self._edit else "crea"}tion aborted.', # cspell: ignoreline
             view=None, embed=None
@@ -240,18 +260,29 @@ class TagCreateView(ui.View):
                 method = self.message.edit
             else:
                 method = interaction.response.edit_message
-            if self.name is not None:
-                self._cog.remove_in_progress_tag(self.name)
+            if self.name is not None and self._edit is None:
+                await self._cog.release_tag_name(self.name, interaction.author.id)
             await method(content='You took too long. Goodbye.', view=None, embed=None)
             return self.stop()
         raise error
 
-class TagSource(paginator.BaseListSource):
-    entries: List[TagLookup]
-    def __init__(self, entries: List[TagLookup]):
-        super().__init__(entries, per_page=20)
+class TagSource(paginator.QuerySource):
+    def __init__(self, count: int):
+        super().__init__(count, self.fetch_page, per_page=20)
+
+    @staticmethod
+    async def fetch_page(offset: int, limit: int) -> List[TagLookup]:
+        async with db.reader() as conn:
+            return await (TagLookup
+                .all()
+                .using_db(conn)
+                .order_by('name')
+                .offset(offset)
+                .limit(limit)
+                .only('id', 'name')
+            )
 
-    async def format_page(self, view: paginator.PaginatorView, page: List[TagLookup]):
+    async def format_page(self, view: paginator.StatelessPaginator, page: List[TagLookup]):
         e = self.base_embed(view, page)
         e.description = '\n'.join([
             f'{i}. {row.name} (id: {row.id})'
@@ -260,20 +291,29 @@ class TagSource(paginator.BaseListSource):
         ])
         return e
 
+async def all_tags_source(inter, target_id: int) -> TagSource:
+    # only the shown page is loaded, by the name index
+    async with db.reader() as conn:
+        count = await TagLookup.all().using_db(conn).count()
+    return TagSource(count)
+
+paginator.register_source('tags:all', all_tags_source)
+
+TRENDING_FLUSH_INTERVAL = 60  # seconds
+trending = TrendingTags()
+
 name_converter = clean_content()
 async def name_autocomp(inter: ApplicationCommandInteraction, user_input: str):
     user_input = name_converter(inter, user_input)
-    rows = await (TagLookup
-        .filter(name__contains=user_input)
-        .order_by('name')
-        .limit(20)
-        .only('name', 'original_id')
-        .prefetch_related('original')
-    )
-    return {
-        f'{row.original.prefix} {row.name}': row.name
-        for row in rows
-    }
+    async with db.reader() as conn:
+        rows = await search_names(user_input, limit=20, using_db=conn)
+    # trending tags go first, even if they are not in the first 20 names
+    choices = {}
+    for name, prefix in (*trending.matching(user_input), *rows):
+        choices[f'{prefix} {name}'] = name
+        if len(choices) == 20:
+            break
+    return choices
 
 name_param = partial(commands.param, converter=name_converter, autocomp=name_autocomp)
 
@@ -282,41 +322,63 @@ class Tags(commands.Cog):
 
     def __init__(self, bot: DisnakeHelper):
         self.bot = bot
-        self._tags_being_made = set()
+        # names of tags being made, shared between processes if needed
+        self.reservations = get_reservations()
+        self.trending_flush_loop.start()
+
+    def cog_unload(self):
+        self.trending_flush_loop.stop()
+
+    @tasks.loop(seconds=TRENDING_FLUSH_INTERVAL)
+    async def trending_flush_loop(self):
+        try:
+            await trending.flush()
+        except Exception:
+            traceback.print_exc()
+
+    @trending_flush_loop.before_loop
+    async def before_trending_flush_loop(self):
+        await self.bot.wait_until_db_ready()
+        await trending.load()
+
+    @trending_flush_loop.after_loop
+    async def after_trending_flush_loop(self):
+        try:
+            await trending.flush()
+        except Exception:
+            traceback.print_exc()
 
     async def get_tag(self, name: str, original=True, only=('id', 'name', 'content')) -> Union[TagTable, TagLookup]:
         def not_found(rows):
             if rows is None or len(rows) == 0:
                 raise RuntimeError('Tag not found.')
 
-            names = '\n'.join(r.name for r in rows)
+            names = '\n'.join(name for name, _ in rows)
             raise RuntimeError(f'Tag not found. Did you mean...\n{names}')
 
-        tag = await (TagTable
-            .filter(name=name)
-            .only(*only)
-            .first()
-        )
-        if tag is None:
-            tag = await (TagLookup
+        async with db.reader() as conn:
+            tag = await (TagTable
                 .filter(name=name)
+                .using_db(conn)
+                .only(*only)
                 .first()
-                .prefetch_related('original')
-            )
-            if original and tag is not None:
-                tag = tag.original
-        if tag is None:
-            query = await (TagLookup
-                .filter(name__contains=name)
-                .limit(3)
-                .only('name')
             )
-            not_found(query)
+            if tag is None:
+                tag = await (TagLookup
+                    .filter(name=name)
+                    .using_db(conn)
+                    .first()
+                    .prefetch_related('original')
+                )
+                if original and tag is not None:
+                    tag = tag.original
+            if tag is None:
+                not_found(await search_names(name, limit=3, using_db=conn))
 
         return tag
 
     async def create_tag(self, inter: MessageInteraction, name, content, prefix):
-        async with in_transaction() as tr:
+        async with in_transaction('master') as tr:
             tr: TransactionWrapper
             try:
                 tag = await TagTable.create(
@@ -341,12 +403,10 @@ class Tags(commands.Cog):
                 await tr.commit()
                 await inter.followup.send(f'Tag {name} successfully created.')
 
-    def is_tag_being_made(self, name: str):
-        return name.lower() in self._tags_being_made
-    def add_in_progress_tag(self, name: str):
-        self._tags_being_made.add(name.lower())
-    def remove_in_progress_tag(self, name: str):
-        self._tags_being_made.discard(name.lower())
+    async def reserve_tag_name(self, name: str, owner_id: int) -> bool:
+        return await self.reservations.acquire(name, owner_id)
+    async def release_tag_name(self, name: str, owner_id: int):
+        await self.reservations.release(name, owner_id)
 
     def can_menage(self, user, tag: TagTable):
         if not (user and (tag.owner_id == user.id or self.bot.owner.id == user.id)):
@@ -377,7 +437,7 @@ class Tags(commands.Cog):
         type: Whether what content type will be shown
         """
         try:
-            tag = await self.get_tag(name)
+            tag = await self.get_tag(name, only=('id', 'name', 'content', 'prefix'))
         except RuntimeError as e:
             return await inter.response.send_message(e, ephemeral=True)
         
@@ -392,6 +452,7 @@ class Tags(commands.Cog):
             .filter(id=tag.id)
             .update(uses = F('uses') + 1)
         )
+        trending.use(tag.id, tag.name, tag.prefix)
 
     @tag.sub_command(name='create')
     async def tag_create(self, inter: ApplicationCommandInteraction):
@@ -402,13 +463,16 @@ class Tags(commands.Cog):
 
         if await view.wait():
             if view.name is not None:
-                self.remove_in_progress_tag(view.name)
+                await self.release_tag_name(view.name, inter.author.id)
             return await view.message.edit(content='You took too long. Goodbye.', view=None, embed=None)
         else:
             await view.message.edit(view=None)
 
         if hasattr(view, 'last_interaction'):
-            await self.create_tag(view.last_interaction, view.name, view.content, view.prefix)
+            try:
+                await self.create_tag(view.last_interaction, view.name, view.content, view.prefix)
+            finally:
+                await self.release_tag_name(view.name, inter.author.id)
 
     @tag.sub_command(name='alias')
     async def tag_alias(
@@ -434,13 +498,7 @@ class Tags(commands.Cog):
             embed.description = f'A tag with the name of "{old_name}" does not exist.'
             return await inter.response.send_message(embed=embed,ephemeral=True)
 
-        try:
-            await TagLookup.create(
-                name = new_name,
-                owner_id = inter.author.id,
-                original = tag_lookup.original
-            )
-        except IntegrityError:
+        if not await create_alias(new_name, tag_lookup.original.id, inter.author.id):
             embed.description = 'A tag with this name already exists.'
         else:
             embed.description = f'Tag alias "{new_name}" that points to "{old_name}" successfully created.'
@@ -479,10 +537,12 @@ class Tags(commands.Cog):
             embed.add_field(name='Lookup ID', value=tag.id, inline=False)
 
         elif isinstance(tag, TagTable):
-            rank = await (TagTable
-                .filter(uses__gt=tag.uses)
-                .count()
-            )
+            async with db.reader() as conn:
+                rank = await (TagTable
+                    .filter(uses__gt=tag.uses)
+                    .using_db(conn)
+                    .count()
+                )
             embed.set_footer(text='Tag created at')
             embed.add_field(name='Uses', value=tag.uses)
             embed.add_field(name='Rank', value=rank+1)
@@ -495,14 +555,24 @@ class Tags(commands.Cog):
         """
         Shows all existed tags
         """
-        rows = await (TagLookup
-            .all()
-            .order_by('name')
-            .only('id', 'name')
-        )
-        source = TagSource(rows)
-        view = paginator.PaginatorView(source, interaction=inter)
-        await view.start()
+        await paginator.StatelessPaginator.start('tags:all', inter)
+
+    @tag.sub_command(name='trending')
+    async def tag_trending(self, inter: ApplicationCommandInteraction):
+        """
+        Shows the most used tags lately
+        """
+        top = trending.top(10)
+        embed = Embed(title='Trending tags', color=0x0084c7)
+        if not top:
+            embed.description = 'No tags were used lately.'
+        else:
+            embed.description = '\n'.join(
+                f'{i}. {prefix} {name} ({score:.1f})'
+                for i, (name, prefix, score) in enumerate(top, 1)
+            )
+            embed.set_footer(text=f'Uses weighted by age, halved every {trending.half_life / 3600:g} hours')
+        await inter.response.send_message(embed=embed)
 
     @tag.sub_command(name='edit')
     async def tag_edit(
@@ -553,19 +623,22 @@ class Tags(commands.Cog):
         msg = str(tag)
 
         
-        view = Confirm(author_id=inter.author.id)
-        await inter.response.send_message(f'Are you sure you wanna delete {msg} "{name}"? It cannot be undo.', view=view)
+        view = Confirm(author_id=inter.author.id, nonce=inter.id)
+        await inter.response.send_message(f'Are you sure you wanna delete {msg} "{name}"? It cannot be undo.', components=view.components)
         value = await view.start()
 
         if value is None:
             content = 'You took too long. Goodbye.'
         elif value:
             await tag.delete()
+            if isinstance(tag, TagTable):
+                trending.discard(tag.id)
+                await TagTrend.filter(tag_id=tag.id).delete()
             content = f'{msg.capitalize()} {name} was deleted.'
         else:
             content = 'Canceled'
         
-        await inter.edit_original_message(content=content, view=None)
+        await inter.edit_original_message(content=content, components=[])
 
 def setup(bot):
     bot.add_cog(Tags(bot))
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Optional
+
+import config
+from . import db
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+# expensive commands and how many of each may run at once,
+# these are shed first when the bot is overloaded
+COMMAND_LIMITS: Dict[str, int] = {
+    'tag all': 2,
+    'addbot': 2,
+    'stats commands': 2,
+    'snippets': 4,  # not a command, the GitHub snippets of a message
+}
+MAX_LOOP_LAG = float(config.values.max_loop_lag_ms or 250) / 1000  # seconds
+MAX_DB_QUEUE = int(config.values.max_db_queue or 32)
+# past this many times the limits above every command is shed, not only the expensive ones
+HARD_FACTOR = 4
+
+BUSY_MESSAGE = 'The bot is busy right now, please retry in a few seconds.'
+
+class AdmissionController:
+    """Decides whether a command runs now or is answered with "busy" right away."""
+
+    def __init__(
+        self,
+        bot: DisnakeHelper,
+        *,
+        limits: Dict[str, int] = COMMAND_LIMITS,
+        max_loop_lag: float = MAX_LOOP_LAG,
+        max_db_queue: int = MAX_DB_QUEUE
+    ):
+        self.bot = bot
+        self.limits = limits
+        self.max_loop_lag = max_loop_lag
+        self.max_db_queue = max_db_queue
+        self.running: Counter[str] = Counter()
+        self.shed: Counter[str] = Counter()
+
+    def pressure(self) -> float:
+        """1 or more means overloaded."""
+        return max(
+            self.bot.loop_monitor.recent_lag() / self.max_loop_lag,
+            db.queue_depth() / self.max_db_queue
+        )
+
+    def _reject(self, command: str, reason: str) -> str:
+        self.shed[command] += 1
+        self.bot.metrics.inc('commands_shed_total', command=command, reason=reason)
+        return reason
+
+    def try_acquire(self, command: str) -> Optional[str]:
+        """Returns why the command is shed, or ``None`` if it may run.
+        ``release`` has to be called after an admitted command.
+        """
+        limit = self.limits.get(command)
+        pressure = self.pressure()
+        if pressure >= HARD_FACTOR:
+            return self._reject(command, 'overload')
+        if limit is not None:
+            if pressure >= 1:
+                return self._reject(command, 'overload')
+            if self.running[command] >= limit:
+                return self._reject(command, 'concurrency')
+        self.running[command] += 1
+        return None
+
+    def try_optional(self, command: str) -> Optional[str]:
+        """For work which may be skipped, like autocomplete, it is shed as soon as the bot is overloaded."""
+        if self.pressure() >= 1:
+            return self._reject(command, 'overload')
+        return None
+
+    def release(self, command: str):
+        self.running[command] -= 1
+        if self.running[command] <= 0:
+            del self.running[command]
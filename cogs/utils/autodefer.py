@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Optional
+
+import disnake
+from disnake import InteractionResponse
+
+from .metrics import interaction_command_name
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+DEFAULT_BUDGET = 2.0
+
+def ephemeral_defer(func):
+    """Marks a slash command whose replies are ephemeral, so it's auto-deferred ephemerally.
+    Put it under the command decorator.
+    """
+    func.__auto_defer_ephemeral__ = True
+    return func
+
+class AutoDeferResponse(InteractionResponse):
+    """Interaction response which can be deferred by :class:`AutoDeferrer`.
+    Once it was auto-deferred, ``send_message`` goes to the followup webhook instead.
+
+    The first followup takes the visibility of the defer. So an ephemeral reply
+    after a public auto-defer removes the "thinking" message and is sent as a new
+    ephemeral followup, and a public reply after an ephemeral one stays ephemeral.
+    ``Interaction.send`` goes to the followup webhook directly once deferred,
+    use :func:`send` instead where the reply may be ephemeral.
+    """
+    def __init__(self, parent: disnake.Interaction, *, ephemeral: bool = False):
+        super().__init__(parent)
+        self.ephemeral = ephemeral
+        self.auto_deferred = False
+        self._followed_up = False
+        self._lock = asyncio.Lock()
+
+    async def send_message(self, content=None, **kwargs):
+        async with self._lock:
+            if not self.auto_deferred:
+                return await super().send_message(content, **kwargs)
+            # later followups are new messages, they have their own visibility
+            first, self._followed_up = not self._followed_up, True
+            if first and kwargs.get('ephemeral', False) and not self.ephemeral:
+                await self._parent.delete_original_message()
+        kwargs.pop('delete_after', None)
+        return await self._parent.followup.send(content, **kwargs)
+
+    async def defer(self, *, ephemeral: bool = False, **kwargs) -> None:
+        # handlers defer through the lock too, an auto-defer already did their job
+        async with self._lock:
+            if self.auto_deferred:
+                return
+            await super().defer(ephemeral=ephemeral, **kwargs)
+
+    async def auto_defer(self) -> bool:
+        async with self._lock:
+            if self.is_done():
+                return False
+            await super().defer(ephemeral=self.ephemeral)
+            self.auto_deferred = True
+            return True
+
+async def send(interaction: disnake.Interaction, content=None, **kwargs):
+    """Like ``Interaction.send``, but replies after an auto-defer keep their visibility."""
+    response = interaction.response
+    if not response.is_done() or getattr(response, 'auto_deferred', False):
+        return await response.send_message(content, **kwargs)
+    return await interaction.send(content, **kwargs)
+
+class AutoDeferrer:
+    """Defers slash command interactions whose handler didn't respond within ``budget`` seconds."""
+
+    def __init__(self, bot: DisnakeHelper, *, budget: Optional[float] = None):
+        self.bot = bot
+        self.budget = DEFAULT_BUDGET if budget is None else budget
+        self.invoked: Counter[str] = Counter()
+        self.fired: Counter[str] = Counter()
+        self._handles: Dict[int, asyncio.TimerHandle] = {}
+
+    @contextmanager
+    def watch(self, interaction: disnake.ApplicationCommandInteraction):
+        if interaction.data.type is not disnake.ApplicationCommandType.chat_input:
+            yield
+            return
+
+        interaction._cs_response = AutoDeferResponse(interaction, ephemeral=self._ephemeral(interaction))
+        self.bot.defer_pool[interaction.id] = interaction
+        self._handles[interaction.id] = self.bot.loop.call_later(self.budget, self._fire, interaction)
+        try:
+            yield
+        finally:
+            self.invoked[interaction_command_name(interaction)] += 1
+            handle = self._handles.pop(interaction.id, None)
+            if handle is not None:
+                handle.cancel()
+            self.bot.defer_pool.pop(interaction.id, None)
+
+    def _ephemeral(self, interaction: disnake.ApplicationCommandInteraction) -> bool:
+        command = self.bot.all_slash_commands.get(interaction.data.name)
+        chain, _ = interaction.data._get_chain_and_kwargs()
+        for name in chain:
+            command = command and command.children.get(name)
+        return getattr(getattr(command, 'callback', None), '__auto_defer_ephemeral__', False)
+
+    def _fire(self, interaction: disnake.ApplicationCommandInteraction):
+        self._handles.pop(interaction.id, None)
+        asyncio.ensure_future(self._defer(interaction))
+
+    async def _defer(self, interaction: disnake.ApplicationCommandInteraction):
+        try:
+            deferred = await interaction.response.auto_defer()
+        except disnake.HTTPException:
+            # interaction already expired or was answered in the meantime
+            return
+        if deferred:
+            name = interaction_command_name(interaction)
+            self.fired[name] += 1
+            self.bot.metrics.inc('auto_defer_total', command=name)
+
+    def stats(self) -> Dict[str, tuple]:
+        """Returns ``{command: (invoked, auto deferred)}``."""
+        return {name: (count, self.fired[name]) for name, count in self.invoked.most_common()}
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+import gzip
+import shutil
+import sqlite3
+import asyncio
+import datetime
+from typing import List
+
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.005  # seconds between the steps, lets writers through
+
+class BackupError(RuntimeError):
+    pass
+
+def _copy(source_path: str, target_path: str) -> None:
+    source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+    target = sqlite3.connect(target_path)
+    try:
+        # copies the pages in small steps, the source is locked only during each step
+        source.backup(target, pages=PAGES_PER_STEP, sleep=STEP_SLEEP)
+        result = target.execute('PRAGMA integrity_check').fetchone()[0]
+        if result != 'ok':
+            raise BackupError(f'Integrity check of {target_path} failed: {result}')
+    finally:
+        target.close()
+        source.close()
+
+def _compress(path: str) -> str:
+    compressed = f'{path}.gz'
+    with open(path, 'rb') as src, gzip.open(compressed, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(path)
+    return compressed
+
+def _rotate(directory: str, keep: int) -> List[str]:
+    snapshots = sorted(f for f in os.listdir(directory) if f.startswith('db-') and f.endswith('.sqlite.gz'))
+    removed = snapshots[:-keep] if keep else []
+    for name in removed:
+        os.remove(os.path.join(directory, name))
+    return removed
+
+def _backup(source_path: str, directory: str, keep: int) -> str:
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+    target_path = os.path.join(directory, f'db-{stamp}.sqlite')
+    try:
+        _copy(source_path, target_path)
+    except BaseException:
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        raise
+    snapshot = _compress(target_path)
+    _rotate(directory, keep)
+    return snapshot
+
+async def backup(source_path: str, directory: str, *, keep: int = 7) -> str:
+    """Makes a verified, compressed snapshot of a live SQLite database in a worker thread.
+    Returns the snapshot path.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _backup, source_path, directory, keep)
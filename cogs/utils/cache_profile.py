@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from typing import Any, Dict, NamedTuple, Optional
+
+import disnake
+
+class CacheProfile(NamedTuple):
+    intents: disnake.Intents
+    member_cache_flags: disnake.MemberCacheFlags
+    max_messages: Optional[int]
+    chunk_guilds_at_startup: bool
+    # chunk a guild in the background when a command is first used there
+    lazy_chunk: bool
+
+    def bot_kwargs(self) -> Dict[str, Any]:
+        return {
+            'intents': self.intents,
+            'member_cache_flags': self.member_cache_flags,
+            'max_messages': self.max_messages,
+            'chunk_guilds_at_startup': self.chunk_guilds_at_startup,
+        }
+
+def _needed_intents() -> disnake.Intents:
+    # guilds, members (join events and roles), messages (snippets, wait_for) and reactions (addbot)
+    intents = disnake.Intents.none()
+    intents.guilds = True
+    intents.members = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    intents.guild_reactions = True
+    if hasattr(intents, 'message_content'):
+        intents.message_content = True
+    return intents
+
+def full() -> CacheProfile:
+    """Everything is requested and cached, as before profiles existed."""
+    return CacheProfile(
+        intents=disnake.Intents.all(),
+        member_cache_flags=disnake.MemberCacheFlags.all(),
+        max_messages=1000,
+        chunk_guilds_at_startup=True,
+        lazy_chunk=False,
+    )
+
+def lean() -> CacheProfile:
+    """Only the events the bot uses, members are cached for the guilds where commands are used."""
+    intents = _needed_intents()
+    return CacheProfile(
+        intents=intents,
+        member_cache_flags=disnake.MemberCacheFlags.from_intents(intents),
+        max_messages=200,
+        chunk_guilds_at_startup=False,
+        lazy_chunk=True,
+    )
+
+def minimal() -> CacheProfile:
+    """No member or message cache at all, members are fetched when needed."""
+    return CacheProfile(
+        intents=_needed_intents(),
+        member_cache_flags=disnake.MemberCacheFlags.none(),
+        max_messages=None,
+        chunk_guilds_at_startup=False,
+        lazy_chunk=False,
+    )
+
+PROFILES = {
+    'full': full,
+    'lean': lean,
+    'minimal': minimal,
+}
+
+def get_profile(name: Optional[str], *, max_messages: Optional[str] = None) -> CacheProfile:
+    try:
+        profile = PROFILES[name or 'full']()
+    except KeyError:
+        raise ValueError(f'Unknown cache profile {name!r}, expected one of {", ".join(PROFILES)}') from None
+    if max_messages is not None:
+        profile = profile._replace(max_messages=int(max_messages) or None)
+    return profile
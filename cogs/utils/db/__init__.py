@@ -1,30 +1,214 @@
+import time
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import AsyncIterator, Callable, List, Optional
+
 from tortoise import Tortoise, run_async
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.backends.base.config_generator import expand_db_url
+from tortoise.exceptions import OperationalError
+from tortoise.utils import get_schema_sql
 from tortoise.expressions import *
 from tortoise.transactions import in_transaction
 
 from tortoise.backends.sqlite.client import TransactionWrapper
 
+import config
+
+DB_PATH = 'data/db.sqlite'
+DATABASE_URL = config.values.database_url or f'sqlite://{DB_PATH}'
+IS_POSTGRES = DATABASE_URL.startswith(('postgres://', 'postgresql://', 'asyncpg://'))
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # WAL is durable on commit with NORMAL, FULL only adds an fsync per transaction
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,  # KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,  # ms
+    'temp_store': 'MEMORY',
+}
+# read-only connections used by `reader()`, writes keep going through
+# the single "master" connection which serializes them.
+# PostgreSQL has its own connection pool and doesn't need them
+READ_POOL_SIZE = 0 if IS_POSTGRES else int(config.values.db_read_pool or 4)
+
+POSTGRES_POOL = {
+    'minsize': int(config.values.db_pool_min or 1),
+    'maxsize': int(config.values.db_pool_max or 10),
+    'statement_cache_size': int(config.values.db_statement_cache or 100),
+    'command_timeout': float(config.values.db_query_timeout or 10),  # seconds, per query
+}
+# indexes which tortoise cannot describe, trigram index makes `LIKE '%name%'` use an index
+POSTGRES_DDL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm;'
+    'CREATE INDEX IF NOT EXISTS tagslookup_name_trgm_idx ON tagslookup USING gin (name gin_trgm_ops);'
+)
+
+def sqlite_connection(file_path: str = DB_PATH, **pragmas) -> dict:
+    return {
+        'engine': 'tortoise.backends.sqlite',
+        'credentials': {'file_path': file_path, **SQLITE_PRAGMAS, **pragmas}
+    }
+
+def postgres_connection(url: str, **pool) -> dict:
+    connection = expand_db_url(url)
+    connection['credentials'] = {**POSTGRES_POOL, **pool, **connection['credentials']}
+    return connection
+
+def master_connection(url: str = DATABASE_URL) -> dict:
+    if IS_POSTGRES:
+        return postgres_connection(url)
+    connection = expand_db_url(url)
+    return sqlite_connection(**connection['credentials'])
+
+READERS = [f'reader_{i}' for i in range(READ_POOL_SIZE)]
+
 TORTOISE_ORM = {
     'apps': {
         'tags': {
+            # aerich keeps its migration history in this app only
             'models': ['cogs.utils.db.tags', 'aerich.models'],
             'default_connection': 'master'
         },
         'remind': {
-            'models': ['cogs.utils.db.remind', 'aerich.models'],
+            'models': ['cogs.utils.db.remind'],
             'default_connection': 'master',
         },
         'users': {
-            'models': ['cogs.utils.db.users', 'aerich.models'],
+            'models': ['cogs.utils.db.users'],
+            'default_connection': 'master',
+        },
+        'stats': {
+            'models': ['cogs.utils.db.stats'],
+            'default_connection': 'master',
+        },
+        'addbot': {
+            'models': ['cogs.utils.db.addbot'],
             'default_connection': 'master',
         }
     },
-    'connections': {'master': 'sqlite://data/db.sqlite'}
+    'connections': {
+        'master': master_connection(),
+        **{
+            name: sqlite_connection(**master_connection()['credentials'], query_only='ON')
+            for name in READERS
+        }
+    }
 }
 
-async def init(*, reload=True):
+_idle_readers: Optional[asyncio.Queue] = None
+_waiting_readers = 0
+
+@asynccontextmanager
+async def reader() -> AsyncIterator[BaseDBAsyncClient]:
+    """Gives an idle read-only connection for ``.using_db()``.
+    Falls back to the master connection when the read pool is disabled.
+    """
+    if _idle_readers is None:
+        yield Tortoise.get_connection('master')
+        return
+    global _waiting_readers
+    _waiting_readers += 1
+    try:
+        name = await _idle_readers.get()
+    finally:
+        _waiting_readers -= 1
+    try:
+        yield Tortoise.get_connection(name)
+    finally:
+        _idle_readers.put_nowait(name)
+
+QueryObserver = Callable[[str, Optional[list], float], None]
+# called with (sql, values, duration) after every query made through the ORM
+query_observers: List[QueryObserver] = []
+
+_QUERY_METHODS = ('execute_insert', 'execute_many', 'execute_query', 'execute_query_dict', 'execute_script')
+_in_query: ContextVar[bool] = ContextVar('_in_query', default=False)
+_queries_in_flight = 0
+
+def queue_depth() -> int:
+    """Queries started but not finished, SQLite runs them one at a time,
+    plus callers waiting for a reader connection.
+    """
+    return _queries_in_flight + _waiting_readers
+
+def _timed(method):
+    @wraps(method)
+    async def wrapper(self, query, *args, **kwargs):
+        if _in_query.get():
+            # nested call of another client method, already being timed
+            return await method(self, query, *args, **kwargs)
+
+        global _queries_in_flight
+        token = _in_query.set(True)
+        _queries_in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            _queries_in_flight -= 1
+            _in_query.reset(token)
+            values = args[0] if args else kwargs.get('values')
+            for observer in query_observers:
+                observer(query, values, duration)
+    wrapper.__timed__ = True
+    return wrapper
+
+def _instrument(client_cls: type):
+    classes = [client_cls]
+    for cls in classes:
+        classes.extend(cls.__subclasses__())
+        for name in _QUERY_METHODS:
+            method = cls.__dict__.get(name)
+            if method is not None and not getattr(method, '__timed__', False):
+                setattr(cls, name, _timed(method))
+
+SCHEMA_TABLE = 'schema_fingerprint'
+
+def schema_fingerprint(client: BaseDBAsyncClient) -> str:
+    return hashlib.sha256(get_schema_sql(client, safe=True).encode()).hexdigest()
+
+async def ensure_schema(connection_name: str = 'master') -> bool:
+    """Creates missing tables only if the models changed since the last run.
+    Altered columns are not handled here, use aerich migrations for them.
+    Returns whether any DDL was run.
+    """
+    client = Tortoise.get_connection(connection_name)
+    fingerprint = schema_fingerprint(client)
+    try:
+        rows = await client.execute_query_dict(f'SELECT fingerprint FROM {SCHEMA_TABLE}')
+    except OperationalError:
+        rows = []
+    if rows and rows[0]['fingerprint'] == fingerprint:
+        return False
+
+    await Tortoise.generate_schemas(safe=True)
+    if client.capabilities.dialect == 'postgres':
+        await client.execute_script(POSTGRES_DDL)
+    await client.execute_script(
+        f'CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (fingerprint VARCHAR(64) NOT NULL);'
+        f'DELETE FROM {SCHEMA_TABLE};'
+        f"INSERT INTO {SCHEMA_TABLE} (fingerprint) VALUES ('{fingerprint}');"
+    )
+    if rows:
+        print('Database models changed, created missing tables. Run aerich for altered columns.')
+    return True
+
+async def init(*, reload=True, orm_config: dict = TORTOISE_ORM):
+    global _idle_readers
     if reload:
         await Tortoise.close_connections()
-    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.init(config=orm_config)
+    _instrument(type(Tortoise.get_connection('master')))
+
+    readers = [name for name in orm_config['connections'] if name.startswith('reader_')]
+    _idle_readers = asyncio.Queue() if readers else None
+    for name in readers:
+        _idle_readers.put_nowait(name)
     if reload:
-        await Tortoise.generate_schemas()
+        await ensure_schema()
@@ -0,0 +1,21 @@
+from tortoise.models import Model
+from tortoise.fields import (
+    BigIntField,
+    CharField,
+    DatetimeField,
+    JSONField
+)
+
+class AddBotRequest(Model):
+    message_id = BigIntField(pk=True)
+
+    bot_id = BigIntField()
+    requester_id = BigIntField()
+    status = CharField(16, default='pending', index=True)
+    handled_by = BigIntField(null=True)
+    created_at = DatetimeField(auto_now_add=True)
+    # request embed as posted, so it can be edited without fetching the message
+    embed = JSONField(default={})
+
+    class Meta:
+        table = 'addbot_requests'
@@ -9,7 +9,7 @@ from tortoise.fields import (
 class Reminders(Model):
     id = BigIntField(pk=True)
 
-    expires = DatetimeField()
+    expires = DatetimeField(index=True)
     created = DatetimeField(auto_now_add=True)
     event = CharField(32)
     extra = JSONField(default={})
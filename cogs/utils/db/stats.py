@@ -3,12 +3,29 @@ from tortoise.fields import (
     BigIntField,
     DatetimeField,
     CharField,
+    IntField
 )
 
 class Commands(Model):
     id = BigIntField(pk=True)
 
+    guild_id = BigIntField(null=True)
     channel_id = BigIntField()
     author_id = BigIntField()
-    used = DatetimeField(auto_now_add=True)
-    command = CharField()
+    used = DatetimeField(auto_now_add=True, index=True)
+    command = CharField(100)
+
+    class Meta:
+        table = 'commands'
+
+class CommandsRollup(Model):
+    """Command usage pre-aggregated per hour."""
+    id = BigIntField(pk=True)
+
+    hour = DatetimeField(index=True)
+    command = CharField(100)
+    count = IntField(default=0)
+
+    class Meta:
+        table = 'commands_rollup'
+        unique_together = (('hour', 'command'),)
@@ -1,7 +1,13 @@
+from typing import List, Tuple
+
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import IntegrityError
 from tortoise.models import Model
 from tortoise.fields import (
     IntField,
     CharField,
+    FloatField,
     TextField,
     BigIntField,
     DatetimeField,
@@ -40,3 +46,64 @@ class TagLookup(Model):
 
     class Meta:
         table = 'tagslookup'
+
+class TagReservation(Model):
+    """Tag name lease held while someone goes through the tag creation view."""
+    name = CharField(50, pk=True)
+    owner_id = BigIntField()
+    expires = DatetimeField(index=True)
+
+    class Meta:
+        table = 'tag_reservations'
+
+class TagTrend(Model):
+    """Time-decayed use count of a tag, see ``cogs.utils.trending``."""
+    tag_id = IntField(pk=True)
+    # log2 of the count scaled to the Unix epoch, in half-lives
+    score = FloatField(index=True)
+
+    class Meta:
+        table = 'tag_trends'
+
+def _like_pattern(text: str) -> str:
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+async def search_names(text: str, *, limit: int, using_db: BaseDBAsyncClient) -> List[Tuple[str, str]]:
+    """Returns ``(name, prefix)`` of tags and aliases which names contain ``text``."""
+    if using_db.capabilities.dialect == 'postgres':
+        # answered by the trigram index, without loading model instances
+        rows = await using_db.execute_query_dict(
+            'SELECT l.name, t.prefix FROM tagslookup l JOIN tags t ON t.id = l.original_id '
+            "WHERE l.name LIKE $1 ESCAPE '\\' ORDER BY l.name LIMIT $2",
+            [_like_pattern(text), limit]
+        )
+        return [(row['name'], row['prefix']) for row in rows]
+
+    rows = await (TagLookup
+        .filter(name__contains=text)
+        .using_db(using_db)
+        .order_by('name')
+        .limit(limit)
+        .only('name', 'original_id')
+        .prefetch_related('original')
+    )
+    return [(row.name, row.original.prefix) for row in rows]
+
+async def create_alias(name: str, original_id: int, owner_id: int) -> bool:
+    """Creates an alias, returns ``False`` if the name is already taken."""
+    using_db = Tortoise.get_connection('master')
+    if using_db.capabilities.dialect == 'postgres':
+        # a conflict is not an error here, so nothing has to be rolled back
+        rows = await using_db.execute_query_dict(
+            'INSERT INTO tagslookup (name, original_id, owner_id, created_at) '
+            'VALUES ($1, $2, $3, now()) ON CONFLICT (name) DO NOTHING RETURNING id',
+            [name, original_id, owner_id]
+        )
+        return bool(rows)
+
+    try:
+        await TagLookup.create(name=name, original_id=original_id, owner_id=owner_id)
+    except IntegrityError:
+        return False
+    return True
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+import json
+import asyncio
+import hashlib
+import datetime
+import traceback
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from .send import safe_send_prepare
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+DEFAULT_WINDOW = 60.  # seconds
+REPORTS_DIR = 'data/errors'
+
+def fingerprint(exception: BaseException) -> str:
+    """Same exception type raised from the same code gives the same fingerprint,
+    regardless of the message or the arguments.
+    """
+    frames = traceback.extract_tb(exception.__traceback__)
+    key = '|'.join([
+        f'{type(exception).__module__}.{type(exception).__qualname__}',
+        *(f'{frame.filename}:{frame.name}:{frame.lineno}' for frame in frames)
+    ])
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+class ErrorGroup:
+    __slots__ = ('fingerprint', 'count', 'summary', 'context', 'traceback', 'first_seen')
+
+    def __init__(self, fingerprint: str, summary: str, context: str, tb: str):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.summary = summary
+        self.context = context
+        self.traceback = tb
+        self.first_seen = datetime.datetime.utcnow()
+
+class ErrorReporter:
+    """Collects errors and sends the owner one digest per window
+    instead of a DM for every exception.
+    """
+
+    def __init__(self, bot: DisnakeHelper, *, window: Optional[float] = None, directory: str = REPORTS_DIR):
+        self.bot = bot
+        self.window = DEFAULT_WINDOW if window is None else window
+        self.directory = directory
+        self._groups: Dict[str, ErrorGroup] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._writes: Set[asyncio.Future] = set()
+
+    def start(self):
+        self._task = self.bot.loop.create_task(self._digest_loop())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def report(self, exception: BaseException, context: str) -> str:
+        key = fingerprint(exception)
+        tb = ''.join(traceback.format_exception(type(exception), exception, exception.__traceback__))
+        group = self._groups.get(key)
+        if group is None:
+            summary = f'{type(exception).__name__}: {exception}'
+            group = self._groups[key] = ErrorGroup(key, summary[:200], context, tb)
+        group.count += 1
+        self.bot.metrics.inc('errors_total', fingerprint=key)
+
+        record = {
+            'time': datetime.datetime.utcnow().isoformat(),
+            'fingerprint': key,
+            'context': context,
+            'traceback': tb,
+        }
+        future = self.bot.loop.run_in_executor(None, self._persist, record)
+        self._writes.add(future)
+        future.add_done_callback(self._persisted)
+        return key
+
+    def _persisted(self, future: asyncio.Future):
+        self._writes.discard(future)
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            print('Failed to write error report:')
+            traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+    def _persist(self, record: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{record["time"][:10]}.jsonl')
+        with open(path, 'a', encoding='utf-8') as fp:
+            fp.write(json.dumps(record) + '\n')
+
+    def digest(self, pending: Dict[str, ErrorGroup]) -> str:
+        groups: List[ErrorGroup] = sorted(pending.values(), key=lambda g: -g.count)
+        total = sum(g.count for g in groups)
+        parts = [f'{total} error(s) of {len(groups)} kind(s) in the last {self.window:.0f}s']
+        for group in groups:
+            tb_tail = '\n'.join(group.traceback.rstrip().splitlines()[-6:])
+            parts.append(
+                f'[{group.fingerprint}] x{group.count} since {group.first_seen:%H:%M:%S} UTC\n'
+                f'{group.summary}\n'
+                f'{group.context}\n'
+                f'{tb_tail}'
+            )
+        return '```py\n' + '\n\n'.join(parts) + '\n```'
+
+    def _merge(self, groups: Dict[str, ErrorGroup]):
+        # errors reported while the digest was sent are added to the unsent groups
+        for key, group in groups.items():
+            newer = self._groups.get(key)
+            if newer is not None:
+                group.count += newer.count
+            self._groups[key] = group
+
+    async def send_digest(self):
+        if not self._groups:
+            return
+        groups, self._groups = self._groups, {}
+        try:
+            await self.bot.owner.send(**(await safe_send_prepare(self.digest(groups))))
+        except Exception:
+            # sent with the next digest
+            self._merge(groups)
+            raise
+
+    async def _digest_loop(self):
+        await self.bot.wait_until_ready()
+        while True:
+            await asyncio.sleep(self.window)
+            try:
+                await self.send_digest()
+            except Exception:
+                traceback.print_exc()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import re
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from itertools import islice
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+INTERVAL = .1  # seconds between lag measurements
+DEFAULT_THRESHOLD = .1  # seconds the loop may be blocked for
+STACK_DEPTH = 8
+MAX_OFFENDERS = 50
+
+_ADDRESS = re.compile(r' at 0x[0-9a-f]+|0x[0-9a-f]+|name=\'Task-\d+\' ?')
+
+class Offender:
+    __slots__ = ('key', 'count', 'total', 'max', 'last_seen')
+
+    def __init__(self, key: str):
+        self.key = key
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        self.last_seen = 0.
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.last_seen = time.time()
+
+class _SlowCallbackHandler(logging.Handler):
+    # asyncio debug mode logs "Executing <handle> took 0.123 seconds"
+    def __init__(self, monitor: LoopMonitor):
+        super().__init__(logging.WARNING)
+        self.monitor = monitor
+
+    def emit(self, record: logging.LogRecord):
+        if isinstance(record.msg, str) and record.msg.startswith('Executing') and len(record.args or ()) == 2:
+            handle, duration = record.args
+            self.monitor.record(f'slow callback: {_ADDRESS.sub("", str(handle))}', duration)
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+class LoopMonitor:
+    """Measures how late the event loop wakes up. A watchdog thread
+    samples the stack of the loop thread while it is blocked.
+    """
+
+    def __init__(self, bot: DisnakeHelper, *, threshold: Optional[float] = None, debug: bool = False, interval: float = INTERVAL):
+        self.bot = bot
+        self.threshold = DEFAULT_THRESHOLD if threshold is None else threshold
+        self.debug = debug
+        self.interval = interval
+        self.lags: Deque[float] = deque(maxlen=3000)  # the last 5 minutes
+        self.offenders: Dict[str, Offender] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._handler = _SlowCallbackHandler(self)
+
+    def start(self):
+        """Has to be called from the loop thread."""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = self.bot.loop.create_task(self._lag_loop())
+        threading.Thread(target=self._watchdog, name='loop-watchdog', daemon=True).start()
+        if self.debug:
+            # debug mode makes every callback slower, it is opt-in
+            self.bot.loop.set_debug(True)
+            self.bot.loop.slow_callback_duration = self.threshold
+            logging.getLogger('asyncio').addHandler(self._handler)
+
+    def close(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+        logging.getLogger('asyncio').removeHandler(self._handler)
+
+    def record(self, key: str, duration: float):
+        with self._lock:
+            offender = self.offenders.get(key)
+            if offender is None:
+                if len(self.offenders) >= MAX_OFFENDERS:
+                    del self.offenders[min(self.offenders.values(), key=lambda o: o.total).key]
+                offender = self.offenders[key] = Offender(key)
+            offender.add(duration)
+
+    def top(self, count: int) -> List[Offender]:
+        with self._lock:
+            return sorted(self.offenders.values(), key=lambda o: -o.total)[:count]
+
+    def recent_lag(self, samples: int = 10) -> float:
+        """Highest lag of about the last second, or how long the loop has been blocked now."""
+        recent = max(islice(reversed(self.lags), samples), default=0.)
+        return max(recent, time.monotonic() - self._beat - self.interval)
+
+    def stats(self) -> Dict[str, float]:
+        lags = list(self.lags)
+        return {
+            'p50': percentile(lags, .5),
+            'p95': percentile(lags, .95),
+            'p99': percentile(lags, .99),
+            'max': max(lags, default=0.),
+        }
+
+    async def _lag_loop(self):
+        metrics = self.bot.metrics
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = now = time.monotonic()
+            lag = max(now - start - self.interval, 0.)
+            self.lags.append(lag)
+            metrics.observe('loop_lag_seconds', lag)
+            if lag >= self.threshold:
+                metrics.inc('loop_blocked_total')
+
+    def _sample(self) -> Optional[str]:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)[-STACK_DEPTH:]
+        return ''.join(traceback.format_list(stack)).rstrip()
+
+    def _watchdog(self):
+        blocked_since: Optional[float] = None
+        stack: Optional[str] = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            if blocked_since is not None and beat > blocked_since:
+                # the loop got back, the lag loop has woken up at ``beat``
+                self.record(stack, beat - blocked_since - self.interval)
+                blocked_since = stack = None
+            elif blocked_since is None and time.monotonic() - beat > self.interval + self.threshold:
+                stack = self._sample()
+                if stack is not None:
+                    blocked_since = beat
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import time
+import bisect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+import disnake
+
+BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10.)
+# for histograms of counts, e.g. queries per interaction
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket the ``q`` quantile falls into."""
+        if not self.count:
+            return 0.
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+class InteractionContext:
+    __slots__ = ('kind', 'command', 'db_queries', 'db_time', 'http_requests', 'http_time')
+
+    def __init__(self, kind: str, command: str):
+        self.kind = kind
+        self.command = command
+        self.db_queries = 0
+        self.db_time = 0.
+        self.http_requests = 0
+        self.http_time = 0.
+
+# context of the interaction currently being handled,
+# nested DB and HTTP calls are attributed to it
+current_interaction: ContextVar[Optional[InteractionContext]] = ContextVar('current_interaction', default=None)
+
+def interaction_command_name(interaction: disnake.ApplicationCommandInteraction) -> str:
+    name = [interaction.data.name]
+    options = interaction.data.options
+    while options and options[0].type in (
+        disnake.OptionType.sub_command,
+        disnake.OptionType.sub_command_group
+    ):
+        name.append(options[0].name)
+        options = options[0].options
+    return ' '.join(name)
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(labels: Labels, **extra) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ''
+    escaped = (
+        (k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    )
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+class Metrics:
+    def __init__(self):
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    def observe(self, name: str, value: float, *, buckets: Tuple[float, ...] = BUCKETS, **labels) -> None:
+        series = self.histograms.setdefault(name, {})
+        key = _labels(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        series = self.counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        self.gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self.histograms.get(name, {}).get(_labels(labels))
+
+    @contextmanager
+    def track_interaction(self, kind: str, command: str) -> Iterator[InteractionContext]:
+        ctx = InteractionContext(kind, command)
+        token = current_interaction.set(ctx)
+        start = time.perf_counter()
+        try:
+            yield ctx
+        finally:
+            current_interaction.reset(token)
+            self.observe(f'{kind}_latency_seconds', time.perf_counter() - start, command=command)
+            self.observe(f'{kind}_db_queries', ctx.db_queries, buckets=COUNT_BUCKETS, command=command)
+            self.observe(f'{kind}_db_seconds', ctx.db_time, command=command)
+            if ctx.http_requests:
+                self.observe(f'{kind}_http_seconds', ctx.http_time, command=command)
+
+    def on_query(self, sql: str, values: Optional[list], duration: float) -> None:
+        ctx = current_interaction.get()
+        if ctx is not None:
+            ctx.db_queries += 1
+            ctx.db_time += duration
+        self.observe('db_query_seconds', duration, command=ctx.command if ctx else '')
+
+    def on_offload(self, name: str, pool: str, queued: float, run: float) -> None:
+        self.observe('offload_queue_seconds', queued, function=name, pool=pool)
+        self.observe('offload_run_seconds', run, function=name, pool=pool)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        async def on_request_start(session, trace_ctx, params):
+            trace_ctx.start = time.perf_counter()
+
+        async def on_request_end(session, trace_ctx, params):
+            duration = time.perf_counter() - trace_ctx.start
+            ctx = current_interaction.get()
+            if ctx is not None:
+                ctx.http_requests += 1
+                ctx.http_time += duration
+            self.observe(
+                'http_request_seconds', duration,
+                host=params.url.host, status=params.response.status
+            )
+
+        async def on_request_exception(session, trace_ctx, params):
+            self.inc('http_request_errors_total', host=params.url.host)
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        return trace
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for name, series in self.counters.items():
+            lines.append(f'# TYPE {name} counter')
+            for labels, value in series.items():
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+        for name, series in self.gauges.items():
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in series.items():
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+        for name, series in self.histograms.items():
+            lines.append(f'# TYPE {name} histogram')
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels, le=bound)} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels, le="+Inf")} {histogram.count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum}')
+                lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    async def start_server(self, port: int, host: str = '127.0.0.1') -> None:
+        async def handler(request: web.Request) -> web.Response:
+            return web.Response(text=self.render_prometheus(), content_type='text/plain', charset='utf-8')
+
+        app = web.Application()
+        app.router.add_get('/metrics', handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
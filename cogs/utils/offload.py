@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import config
+
+T = TypeVar('T')
+
+THREAD_WORKERS = int(config.values.offload_threads or 4)
+PROCESS_WORKERS = int(config.values.offload_processes or 2)
+# inputs smaller than this (characters, items) aren't worth a trip to a pool
+INLINE_BELOW = int(config.values.offload_inline_below or 16 * 1024)
+# tasks waiting for a worker per pool, callers wait beyond that
+QUEUE_PER_WORKER = 8
+# imported once by the process pool server, so workers start with them loaded
+PROCESS_PRELOAD = ['dateparser']
+
+OffloadObserver = Callable[[str, str, float, float], None]
+# called with (function name, pool, queued seconds, run seconds) after every offloaded call
+offload_observers: List[OffloadObserver] = []
+
+def _run(fn: Callable[..., T], args: tuple, kwargs: dict) -> Tuple[T, float, float]:
+    # wall clock, so the queue time can be measured across processes
+    started = time.time()
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, started, time.perf_counter() - start
+
+def _name(fn: Callable) -> str:
+    fn = getattr(fn, 'func', fn)  # functools.partial
+    return getattr(fn, '__qualname__', type(fn).__qualname__)
+
+def _notify(name: str, pool: str, queued: float, run: float):
+    for observer in offload_observers:
+        observer(name, pool, queued, run)
+
+class _Pool:
+    __slots__ = ('factory', 'workers', 'executor', 'slots')
+
+    def __init__(self, factory: Callable[[], Executor], workers: int):
+        self.factory = factory
+        self.workers = workers
+        self.executor: Optional[Executor] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+
+    def get(self) -> Tuple[Executor, asyncio.Semaphore]:
+        if self.executor is None:
+            self.executor = self.factory()
+            self.slots = asyncio.Semaphore(self.workers * QUEUE_PER_WORKER)
+        return self.executor, self.slots
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self.slots = None
+
+def _process_pool() -> ProcessPoolExecutor:
+    # fork would copy the running bot, spawn would run main.py again
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(PROCESS_PRELOAD)
+    return ProcessPoolExecutor(PROCESS_WORKERS, mp_context=context)
+
+POOLS: Dict[str, _Pool] = {
+    # C code which releases the GIL (hashing, compression, regex on bytes) or blocking IO
+    'thread': _Pool(partial(ThreadPoolExecutor, THREAD_WORKERS, thread_name_prefix='offload'), THREAD_WORKERS),
+    # pure Python CPU work, arguments and results have to be picklable
+    'process': _Pool(_process_pool, PROCESS_WORKERS),
+}
+
+async def offload(fn: Callable[..., T], *args: Any, pool: str = 'thread', size: Optional[int] = None, **kwargs: Any) -> T:
+    """Runs ``fn(*args, **kwargs)`` in a worker pool, so the event loop isn't blocked.
+
+    ``size`` is the size of the input, e.g. ``len(text)``. Calls with inputs
+    smaller than ``INLINE_BELOW`` run inline. Without ``size`` the call is always offloaded.
+    """
+    name = _name(fn)
+    if size is not None and size < INLINE_BELOW:
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        _notify(name, 'inline', 0., time.perf_counter() - start)
+        return result
+
+    executor, slots = POOLS[pool].get()
+    submitted = time.time()
+    async with slots:
+        loop = asyncio.get_running_loop()
+        result, started, run = await loop.run_in_executor(executor, _run, fn, args, kwargs)
+    _notify(name, pool, max(started - submitted, 0.), run)
+    return result
+
+def shutdown():
+    for pool in POOLS.values():
+        pool.shutdown()
@@ -1,199 +1,24 @@
-import asyncio
-from typing import Dict, Optional, Any
+import math
+from typing import Awaitable, Callable, Dict, List, Sequence, Any
 
 import disnake
 from disnake.ext import menus
 
-class PaginatorView(disnake.ui.View):
-    def __init__(
-        self,
-        source: menus.PageSource,
-        *,
-        interaction: disnake.Interaction,
-        check_embeds: bool = True,
-        compact: bool = False,
-    ):
-        super().__init__()
-        self.source: menus.PageSource = source
-        self.check_embeds: bool = check_embeds
-        self.interaction: disnake.Interaction = interaction
-        self.message: Optional[disnake.Message] = None
-        self.current_page: int = 0
-        self.compact: bool = compact
-        self.input_lock = asyncio.Lock()
-        self.clear_items()
-        self.fill_items()
-
-    def fill_items(self) -> None:
-        if not self.compact:
-            self.numbered_page.row = 1
-            self.stop_pages.row = 1
-
-        if self.source.is_paginating():
-            max_pages = self.source.get_max_pages()
-            use_last_and_first = max_pages is not None and max_pages >= 2
-            if use_last_and_first:
-                self.add_item(self.go_to_first_page)  # type: ignore
-            self.add_item(self.go_to_previous_page)  # type: ignore
-            if not self.compact:
-                self.add_item(self.go_to_current_page)  # type: ignore
-            self.add_item(self.go_to_next_page)  # type: ignore
-            if use_last_and_first:
-                self.add_item(self.go_to_last_page)  # type: ignore
-            if not self.compact:
-                self.add_item(self.numbered_page)  # type: ignore
-            self.add_item(self.stop_pages)  # type: ignore
-
-    async def _get_kwargs_from_page(self, page: int) -> Dict[str, Any]:
-        value = await disnake.utils.maybe_coroutine(self.source.format_page, self, page)
-        if isinstance(value, dict):
-            return value
-        elif isinstance(value, str):
-            return {'content': value, 'embed': None}
-        elif isinstance(value, disnake.Embed):
-            return {'embed': value, 'content': None}
-        else:
-            return {}
-
-    async def show_page(self, interaction: disnake.Interaction, page_number: int) -> None:
-        page = await self.source.get_page(page_number)
-        self.current_page = page_number
-        kwargs = await self._get_kwargs_from_page(page)
-        self._update_labels(page_number)
-        if kwargs:
-            if interaction.response.is_done():
-                if self.message:
-                    await self.message.edit(**kwargs, view=self)
-            else:
-                await interaction.response.edit_message(**kwargs, view=self)
-
-    def _update_labels(self, page_number: int) -> None:
-        self.go_to_first_page.disabled = page_number == 0
-        if self.compact:
-            max_pages = self.source.get_max_pages()
-            self.go_to_last_page.disabled = max_pages is None or (page_number + 1) >= max_pages
-            self.go_to_next_page.disabled = max_pages is not None and (page_number + 1) >= max_pages
-            self.go_to_previous_page.disabled = page_number == 0
-            return
+from .views import (
+    ComponentState,
+    author_check,
+    make_custom_id,
+    persistent_handler,
+    remove_persistent_handler
+)
 
-        self.go_to_current_page.label = str(page_number + 1)
-        self.go_to_previous_page.label = str(page_number)
-        self.go_to_next_page.label = str(page_number + 2)
-        self.go_to_next_page.disabled = False
-        self.go_to_previous_page.disabled = False
+class _EmbedMixin:
+    per_page: int
 
-        max_pages = self.source.get_max_pages()
-        if max_pages is not None:
-            self.go_to_last_page.disabled = (page_number + 1) >= max_pages
-            if (page_number + 1) >= max_pages:
-                self.go_to_next_page.disabled = True
-                self.go_to_next_page.label = '…'
-            if page_number == 0:
-                self.go_to_previous_page.disabled = True
-                self.go_to_previous_page.label = '…'
-
-    async def show_checked_page(self, interaction: disnake.Interaction, page_number: int) -> None:
-        max_pages = self.source.get_max_pages()
-        try:
-            if max_pages is None:
-                # If it doesn't give maximum pages, it cannot be checked
-                await self.show_page(interaction, page_number)
-            elif max_pages > page_number >= 0:
-                await self.show_page(interaction, page_number)
-        except IndexError:
-            # An error happened that can be handled, so ignore it.
-            pass
-
-    async def interaction_check(self, interaction: disnake.Interaction) -> bool:
-        if interaction.user and interaction.user in (self.interaction.bot.owner, self.interaction.author):
-            return True
-        await interaction.response.send_message('This pagination menu cannot be controlled by you, sorry!', ephemeral=True)
-        return False
-
-    async def on_timeout(self) -> None:
-        if self.message:
-            await self.message.edit(view=None)
-
-    async def on_error(self, error: Exception, item: disnake.ui.Item, interaction: disnake.Interaction) -> None:
-        if interaction.response.is_done():
-            await interaction.followup.send('An unknown error occurred, sorry', ephemeral=True)
-        else:
-            await interaction.response.send_message('An unknown error occurred, sorry', ephemeral=True)
-
-    async def start(self) -> None:
-        if self.check_embeds and not self.interaction.channel.permissions_for(self.interaction.me).embed_links:
-            await self.interaction.response.send_message('Bot does not have embed links permission in this channel.', ephemeral=True)
-            return
-
-        await self.source._prepare_once()
-        page = await self.source.get_page(0)
-        kwargs = await self._get_kwargs_from_page(page)
-        self._update_labels(0)
-        await self.interaction.response.send_message(**kwargs, view=self)
-        self.message = await self.interaction.original_message()
-
-    @disnake.ui.button(label='≪', style=disnake.ButtonStyle.grey)
-    async def go_to_first_page(self, button: disnake.ui.Button, interaction: disnake.Interaction):
-        """go to the first page"""
-        await self.show_page(interaction, 0)
-
-    @disnake.ui.button(label='Back', style=disnake.ButtonStyle.blurple)
-    async def go_to_previous_page(self, button: disnake.ui.Button, interaction: disnake.Interaction):
-        """go to the previous page"""
-        await self.show_checked_page(interaction, self.current_page - 1)
-
-    @disnake.ui.button(label='Current', style=disnake.ButtonStyle.grey, disabled=True)
-    async def go_to_current_page(self, button: disnake.ui.Button, interaction: disnake.Interaction):
-        pass
-
-    @disnake.ui.button(label='Next', style=disnake.ButtonStyle.blurple)
-    async def go_to_next_page(self, button: disnake.ui.Button, interaction: disnake.Interaction):
-        """go to the next page"""
-        await self.show_checked_page(interaction, self.current_page + 1)
-
-    @disnake.ui.button(label='≫', style=disnake.ButtonStyle.grey)
-    async def go_to_last_page(self, button: disnake.ui.Button, interaction: disnake.Interaction):
-        """go to the last page"""
-        # The call here is safe because it's guarded by skip_if
-        await self.show_page(interaction, self.source.get_max_pages() - 1)
-
-
-    @disnake.ui.button(label='Skip to page...', style=disnake.ButtonStyle.grey)
-    async def numbered_page(self, button: disnake.ui.Button, interaction: disnake.Interaction):
-        """lets you type a page number to go to"""
-        if self.input_lock.locked():
-            await interaction.response.send_message('Already waiting for your response...', ephemeral=True)
-            return
-
-        if self.message is None:
-            return
+    def total(self) -> int:
+        raise NotImplementedError
 
-        async with self.input_lock:
-            channel = self.message.channel
-            author_id = interaction.user and interaction.user.id
-            await interaction.response.send_message('What page do you want to go to?', ephemeral=True)
-
-            def message_check(m):
-                return m.author.id == author_id and channel == m.channel and m.content.isdigit()
-
-            try:
-                msg = await self.interaction.bot.wait_for('message', check=message_check, timeout=30.0)
-            except asyncio.TimeoutError:
-                await interaction.followup.send('Took too long.', ephemeral=True)
-            else:
-                page = int(msg.content)
-                await msg.delete()
-                await self.show_checked_page(interaction, page - 1)
-
-    @disnake.ui.button(label='Quit', style=disnake.ButtonStyle.red)
-    async def stop_pages(self, button: disnake.ui.Button, interaction: disnake.Interaction):
-        """stops the pagination session."""
-        await interaction.response.defer()
-        await interaction.delete_original_message()
-        self.stop()
-
-class BaseListSource(menus.ListPageSource):
-    def base_embed(self, view: PaginatorView, entries) -> disnake.Embed:
+    def base_embed(self, view: 'StatelessPaginator', entries) -> disnake.Embed:
         e = disnake.Embed(
             color=0x0084c7
         )
@@ -202,7 +27,173 @@ class BaseListSource(menus.ListPageSource):
             e.set_footer(
                 text=(
                     f'Page {view.current_page+1}/{self.get_max_pages()} | '
-                    f'Showed {offset+1}-{offset+len(entries)}/{len(self.entries)}'
+                    f'Showed {offset+1}-{offset+len(entries)}/{self.total()}'
                 )
             )
-        return e
\ No newline at end of file
+        return e
+
+class BaseListSource(_EmbedMixin, menus.ListPageSource):
+    def total(self) -> int:
+        return len(self.entries)
+
+PageFetcher = Callable[[int, int], Awaitable[Sequence[Any]]]
+
+class QuerySource(_EmbedMixin, menus.PageSource):
+    """Loads only the shown page, ``fetch(offset, limit)`` returns its entries.
+    For lists which are too big to load on every click.
+    """
+    def __init__(self, count: int, fetch: PageFetcher, *, per_page: int):
+        self.count = count
+        self.fetch = fetch
+        self.per_page = per_page
+
+    def total(self) -> int:
+        return self.count
+
+    def is_paginating(self) -> bool:
+        return self.count > self.per_page
+
+    def get_max_pages(self) -> int:
+        return max(math.ceil(self.count / self.per_page), 1)
+
+    async def get_page(self, page_number: int) -> Sequence[Any]:
+        return await self.fetch(page_number * self.per_page, self.per_page)
+
+# actions of a paginator, custom_ids must be unique within a message
+# and the edge buttons point to the same pages as the others
+_SUFFIXES = ('', ':edge', ':jump')
+JUMP_OPTIONS = 25  # the most a select menu can have
+
+SourceFactory = Callable[[disnake.Interaction, int], Awaitable[menus.PageSource]]
+_sources: Dict[str, SourceFactory] = {}
+
+def register_source(name: str, factory: SourceFactory) -> None:
+    """Registers a page source factory for :class:`StatelessPaginator` under ``name``.
+    The factory is called with the interaction and the ``target_id`` stored in the buttons.
+    """
+    _sources[name] = factory
+    for suffix in _SUFFIXES:
+        persistent_handler(name + suffix)(_show_persistent_page)
+
+def remove_source(name: str) -> None:
+    _sources.pop(name, None)
+    for suffix in _SUFFIXES:
+        remove_persistent_handler(name + suffix)
+
+def _jump_pages(current: int, max_pages: int) -> List[int]:
+    """Pages around the current one and the rest spread evenly, at most ``JUMP_OPTIONS``."""
+    if max_pages <= JUMP_OPTIONS:
+        return list(range(max_pages))
+    near = {page for page in range(current - 2, current + 3) if 0 <= page < max_pages}
+    spread = JUMP_OPTIONS - len(near)
+    pages = near | {round(i * (max_pages - 1) / (spread - 1)) for i in range(spread)}
+    return sorted(pages)
+
+class StatelessPaginator:
+    """Paginator that keeps its current page in the buttons' ``custom_id``.
+    The page source is rebuilt from its registered factory on every click,
+    so nothing is held in memory between clicks and it survives restarts.
+    """
+    def __init__(self, name: str, source: menus.PageSource, *, author_id: int, target_id: int = 0):
+        self.name = name
+        self.source = source
+        self.author_id = author_id
+        self.target_id = target_id
+        self.current_page = 0
+
+    def _button(self, label: str, page: int, *, edge: bool = False, **kwargs) -> disnake.ui.Button:
+        name = f'{self.name}:edge' if edge else self.name
+        return disnake.ui.Button(
+            label=label,
+            custom_id=make_custom_id(name, self.author_id, self.target_id, page),
+            **kwargs
+        )
+
+    def _jump_select(self, max_pages: int) -> disnake.ui.Select:
+        return disnake.ui.Select(
+            placeholder='Jump to page...',
+            # the page is taken from the selected value
+            custom_id=make_custom_id(f'{self.name}:jump', self.author_id, self.target_id, self.current_page),
+            options=[
+                disnake.SelectOption(label=f'Page {page + 1}', value=str(page), default=page == self.current_page)
+                for page in _jump_pages(self.current_page, max_pages)
+            ]
+        )
+
+    def components(self) -> List[disnake.ui.ActionRow]:
+        quit_button = disnake.ui.Button(
+            label='Quit', style=disnake.ButtonStyle.red,
+            custom_id=make_custom_id('delete', self.author_id)
+        )
+        if not self.source.is_paginating():
+            return [disnake.ui.ActionRow(quit_button)]
+
+        page = self.current_page
+        max_pages = self.source.get_max_pages()
+        is_last = max_pages is not None and (page + 1) >= max_pages
+        buttons = []
+        if max_pages is not None and max_pages >= 2:
+            buttons.append(self._button('≪', 0, edge=True, disabled=page == 0))
+        buttons.append(self._button(
+            str(page) if page else '…', page - 1,
+            style=disnake.ButtonStyle.blurple, disabled=page == 0
+        ))
+        buttons.append(disnake.ui.Button(
+            label=str(page + 1), disabled=True,
+            custom_id=make_custom_id(f'{self.name}:current', self.author_id, self.target_id, page)
+        ))
+        buttons.append(self._button(
+            '…' if is_last else str(page + 2), page + 1,
+            style=disnake.ButtonStyle.blurple, disabled=is_last
+        ))
+        if max_pages is not None and max_pages >= 2:
+            buttons.append(self._button('≫', max_pages - 1, edge=True, disabled=is_last))
+        rows = [disnake.ui.ActionRow(*buttons)]
+        if max_pages is not None and max_pages >= 3:
+            rows.append(disnake.ui.ActionRow(self._jump_select(max_pages)))
+        rows.append(disnake.ui.ActionRow(quit_button))
+        return rows
+
+    async def render(self, page_number: int) -> Dict[str, Any]:
+        max_pages = self.source.get_max_pages()
+        if max_pages is not None:
+            page_number = min(page_number, max_pages - 1)
+        self.current_page = max(0, page_number)
+
+        page = await self.source.get_page(self.current_page)
+        value = await disnake.utils.maybe_coroutine(self.source.format_page, self, page)
+        if isinstance(value, dict):
+            kwargs = value
+        elif isinstance(value, str):
+            kwargs = {'content': value, 'embed': None}
+        elif isinstance(value, disnake.Embed):
+            kwargs = {'embed': value, 'content': None}
+        else:
+            kwargs = {}
+        kwargs['components'] = self.components()
+        return kwargs
+
+    @classmethod
+    async def start(cls, name: str, interaction: disnake.Interaction, *, target_id: int = 0) -> None:
+        if not interaction.channel.permissions_for(interaction.me).embed_links:
+            await interaction.response.send_message('Bot does not have embed links permission in this channel.', ephemeral=True)
+            return
+
+        source = await _sources[name](interaction, target_id)
+        await source._prepare_once()
+        paginator = cls(name, source, author_id=interaction.author.id, target_id=target_id)
+        await interaction.response.send_message(**(await paginator.render(0)))
+
+async def _show_persistent_page(interaction: disnake.MessageInteraction, state: ComponentState) -> None:
+    if not await author_check(interaction, state):
+        return
+    name, page = state.action, state.page
+    for suffix in _SUFFIXES[1:]:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    if state.action.endswith(':jump'):
+        page = int(interaction.values[0])
+    source = await _sources[name](interaction, state.target_id)
+    await source._prepare_once()
+    paginator = StatelessPaginator(name, source, author_id=state.author_id, target_id=state.target_id)
+    await interaction.response.edit_message(**(await paginator.render(page)))
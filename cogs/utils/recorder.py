@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import os
+import gzip
+import hmac
+import json
+import time
+import asyncio
+import datetime
+import hashlib
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set
+
+import disnake
+
+from .views import ComponentState
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+RECORDINGS_DIR = 'data/recordings'
+FLUSH_INTERVAL = 10.  # seconds
+FLUSH_SIZE = 1000  # entries
+# option values which are public anyway and needed to replay a realistic mix,
+# every other value is replaced by its hash and length
+PUBLIC_OPTIONS = {
+    ('tag show', 'name'), ('tag show', 'type'),
+    ('tag info', 'name'),
+    ('tag edit', 'name'),
+    ('tag delete', 'name'),
+    ('tag alias', 'old_name'),
+    ('charinfo', 'characters'),
+    ('charsearch', 'query'),
+    ('stats commands', 'window'),
+}
+
+def _options(interaction: disnake.ApplicationCommandInteraction) -> List[disnake.ApplicationCommandInteractionDataOption]:
+    options = interaction.data.options
+    while options and options[0].type in (
+        disnake.OptionType.sub_command,
+        disnake.OptionType.sub_command_group
+    ):
+        options = options[0].options
+    return options
+
+class InteractionRecorder:
+    """Writes anonymized interaction metadata to ``<directory>/<date>.jsonl.gz``
+    for ``benchmarks.replay_log``. IDs are replaced with keyed hashes,
+    so the same user or channel has the same hash within a recording.
+    """
+
+    def __init__(self, bot: DisnakeHelper, *, enabled: bool = False, directory: str = RECORDINGS_DIR, salt: Optional[str] = None):
+        self.bot = bot
+        self.enabled = enabled
+        self.directory = directory
+        # without a configured salt hashes only match within one run
+        self._key = salt.encode() if salt else os.urandom(16)
+        self._buffer: List[Dict[str, Any]] = []
+        # entries of interactions being handled, by interaction id
+        self._tracking: Dict[int, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        # one writer, so appends to the same file never interleave
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recorder')
+        self._writes: Set[asyncio.Future] = set()
+
+    def start(self):
+        if self.enabled:
+            self._task = self.bot.loop.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        self.flush()
+        # drain the writes still running or queued
+        await asyncio.gather(*self._writes, return_exceptions=True)
+        self._executor.shutdown()
+
+    def anonymize(self, value: Any) -> str:
+        return hmac.new(self._key, str(value).encode(), hashlib.sha256).hexdigest()[:16]
+
+    def _option_values(self, command: str, options: List[disnake.ApplicationCommandInteractionDataOption]) -> Dict[str, Any]:
+        values = {}
+        for option in options:
+            if (command, option.name) in PUBLIC_OPTIONS:
+                values[option.name] = option.value
+            else:
+                values[option.name] = {'hash': self.anonymize(option.value), 'len': len(str(option.value))}
+        return values
+
+    def _entry(self, kind: str, interaction: disnake.Interaction, command: str) -> Dict[str, Any]:
+        entry = {
+            'time': time.time(),
+            'kind': kind,
+            'command': command,
+            'author': self.anonymize(interaction.author.id),
+            'guild': interaction.guild_id and self.anonymize(interaction.guild_id),
+            'channel': self.anonymize(interaction.channel_id),
+        }
+        if isinstance(interaction, disnake.ApplicationCommandInteraction):
+            options = _options(interaction)
+            entry['options'] = self._option_values(command, options)
+            if kind == 'autocomplete':
+                entry['focused'] = next((option.name for option in options if option.focused), None)
+        elif isinstance(interaction, disnake.MessageInteraction):
+            state = ComponentState.from_custom_id(interaction.data.custom_id)
+            if state is not None:
+                entry['page'] = state.page
+        return entry
+
+    @contextmanager
+    def track(self, kind: str, interaction: disnake.Interaction, command: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        entry = self._tracking[interaction.id] = self._entry(kind, interaction, command)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            entry['error'] = True
+            raise
+        finally:
+            entry['duration'] = time.perf_counter() - start
+            # disnake dispatches command errors as a task, which is
+            # scheduled before this and can still mark the entry
+            self.bot.loop.call_soon(self._buffer_entry, interaction.id)
+
+    def mark_error(self, interaction: disnake.Interaction):
+        """Marks the interaction's entry as failed, for errors handled before they reach :meth:`track`."""
+        entry = self._tracking.get(interaction.id)
+        if entry is not None:
+            entry['error'] = True
+
+    def _buffer_entry(self, interaction_id: int):
+        self._buffer.append(self._tracking.pop(interaction_id))
+        if len(self._buffer) >= FLUSH_SIZE:
+            self.flush()
+
+    def component_command(self, interaction: disnake.MessageInteraction) -> str:
+        state = ComponentState.from_custom_id(interaction.data.custom_id)
+        return f'component {state.action}' if state else 'component'
+
+    def flush(self):
+        if not self._buffer:
+            return
+        entries, self._buffer = self._buffer, []
+        future = self.bot.loop.run_in_executor(self._executor, self._write, entries)
+        self._writes.add(future)
+        future.add_done_callback(self._written)
+
+    def _written(self, future: asyncio.Future):
+        self._writes.discard(future)
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            print('Failed to write interaction recording:')
+            traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{datetime.date.today()}.jsonl.gz')
+        # every flush appends a gzip member, gzip readers read them as one stream
+        with gzip.open(path, 'at', encoding='utf-8') as fp:
+            fp.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                traceback.print_exc()
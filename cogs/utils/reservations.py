@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import time
+import datetime
+from typing import Dict, Optional, Tuple, Union
+
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import Q
+
+import config
+from .db.tags import TagReservation
+
+# a lease outlives the tag creation view (300s) a bit,
+# it is renewed on every view interaction and expires if the view is abandoned
+LEASE_TTL = float(config.values.tag_reservation_ttl or 330)  # seconds
+
+class MemoryReservations:
+    """Leases of this process only, enough when a single process runs the bot."""
+
+    def __init__(self, ttl: float = LEASE_TTL):
+        self.ttl = ttl
+        # name: (owner_id, expires)
+        self._leases: Dict[str, Tuple[int, float]] = {}
+
+    async def acquire(self, name: str, owner_id: int) -> bool:
+        """Reserves the name or renews the lease of the same owner,
+        returns ``False`` if someone else holds it.
+        """
+        name = name.lower()
+        now = time.monotonic()
+        lease = self._leases.get(name)
+        if lease is not None and lease[0] != owner_id and lease[1] > now:
+            return False
+        self._leases[name] = (owner_id, now + self.ttl)
+        return True
+
+    async def release(self, name: str, owner_id: int) -> None:
+        name = name.lower()
+        lease = self._leases.get(name)
+        if lease is not None and lease[0] == owner_id:
+            del self._leases[name]
+
+class DBReservations:
+    """Leases kept in the shared database, for several processes."""
+
+    def __init__(self, ttl: float = LEASE_TTL):
+        self.ttl = ttl
+
+    async def acquire(self, name: str, owner_id: int) -> bool:
+        name = name.lower()
+        now = datetime.datetime.utcnow()
+        expires = now + datetime.timedelta(seconds=self.ttl)
+
+        # renew our own lease or take over an expired one, a single statement so two processes can't both win
+        updated = await (TagReservation
+            .filter(Q(owner_id=owner_id) | Q(expires__lt=now), name=name)
+            .update(owner_id=owner_id, expires=expires)
+        )
+        if updated:
+            return True
+        try:
+            await TagReservation.create(name=name, owner_id=owner_id, expires=expires)
+        except IntegrityError:
+            return False
+        # leases of other names which nobody released
+        await TagReservation.filter(expires__lt=now).delete()
+        return True
+
+    async def release(self, name: str, owner_id: int) -> None:
+        await TagReservation.filter(name=name.lower(), owner_id=owner_id).delete()
+
+Reservations = Union[MemoryReservations, DBReservations]
+
+def get_reservations(kind: Optional[str] = config.values.tag_reservations) -> Reservations:
+    """``db`` is the default when the shards are split between processes."""
+    kind = kind or ('db' if config.values.shard_ids else 'memory')
+    if kind == 'db':
+        return DBReservations()
+    if kind == 'memory':
+        return MemoryReservations()
+    raise ValueError(f'Unknown tag reservations store {kind!r}, expected "memory" or "db"')
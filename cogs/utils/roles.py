@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import time
+import asyncio
+import traceback
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Set
+
+import disnake
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+# Discord doesn't publish member edit limits, these stay well below what we've seen
+RATE = 5  # role requests
+PER = 5.  # seconds
+MAX_RETRIES = 5
+BACKOFF = 1.  # seconds, doubled on every retry
+
+class RoleChange:
+    __slots__ = ('add', 'remove', 'reason', 'retries')
+
+    def __init__(self):
+        self.add: Set[int] = set()
+        self.remove: Set[int] = set()
+        self.reason: Optional[str] = None
+        self.retries = 0
+
+    def merge(self, add: Iterable[int] = (), remove: Iterable[int] = (), reason: Optional[str] = None):
+        # the latest request for a role wins
+        for role_id in add:
+            self.remove.discard(role_id)
+            self.add.add(role_id)
+        for role_id in remove:
+            self.add.discard(role_id)
+            self.remove.add(role_id)
+        if reason is not None:
+            self.reason = reason
+
+class RoleQueue:
+    """Applies role changes of a guild one role request at a time.
+    Pending changes for the same member are merged, so opposite requests cancel out.
+    """
+
+    def __init__(self, bot: DisnakeHelper, guild_id: int, *, rate: int = RATE, per: float = PER):
+        self.bot = bot
+        self.guild_id = guild_id
+        self.rate = rate
+        self.per = per
+        self._pending: OrderedDict[int, RoleChange] = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._task = bot.loop.create_task(self._worker())
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def _report(self):
+        self.bot.metrics.set('role_queue_depth', self.depth, guild=self.guild_id)
+
+    def enqueue(self, member_id: int, *, add: Iterable[int] = (), remove: Iterable[int] = (), reason: Optional[str] = None):
+        change = self._pending.get(member_id)
+        if change is None:
+            change = self._pending[member_id] = RoleChange()
+        change.merge(add, remove, reason)
+        self._report()
+        self._wakeup.set()
+
+    def close(self):
+        self._task.cancel()
+
+    async def _acquire(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * self.per / self.rate)
+
+    async def _worker(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            member_id, change = self._pending.popitem(last=False)
+            self._report()
+            try:
+                await self._apply(member_id, change)
+            except disnake.HTTPException as e:
+                if isinstance(e, disnake.Forbidden) or (400 <= e.status < 500 and e.status != 429):
+                    traceback.print_exc()
+                    continue
+                change.retries += 1
+                if change.retries > MAX_RETRIES:
+                    traceback.print_exc()
+                    continue
+                self.bot.metrics.inc('role_queue_retries_total', guild=self.guild_id)
+                self.bot.loop.create_task(self._retry(member_id, change, BACKOFF * 2 ** (change.retries - 1)))
+            except Exception:
+                traceback.print_exc()
+
+    async def _retry(self, member_id: int, change: RoleChange, delay: float):
+        await asyncio.sleep(delay)
+        newer = self._pending.pop(member_id, None)
+        if newer is not None:
+            # changes requested meanwhile win over the failed ones
+            change.merge(newer.add, newer.remove, newer.reason)
+        self._pending[member_id] = change
+        self._report()
+        self._wakeup.set()
+
+    async def _apply(self, member_id: int, change: RoleChange):
+        guild = self.bot.get_guild(self.guild_id)
+        if guild is None:
+            return
+        member = guild.get_member(member_id)
+        # not cached with lean cache profiles, then every role is requested
+        current = None if member is None else set(member._roles)
+
+        # per role endpoints, unlike a full role list they can't drop roles a stale cache doesn't know of
+        for role_id in change.add:
+            if current is None or role_id not in current:
+                await self._acquire()
+                await self.bot.http.add_role(self.guild_id, member_id, role_id, reason=change.reason)
+                self.bot.metrics.inc('role_queue_edits_total', guild=self.guild_id)
+        for role_id in change.remove:
+            if current is None or role_id in current:
+                await self._acquire()
+                await self.bot.http.remove_role(self.guild_id, member_id, role_id, reason=change.reason)
+                self.bot.metrics.inc('role_queue_edits_total', guild=self.guild_id)
+
+class RoleQueues:
+    def __init__(self, bot: DisnakeHelper):
+        self.bot = bot
+        self._queues: Dict[int, RoleQueue] = {}
+
+    def get(self, guild_id: int) -> RoleQueue:
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = RoleQueue(self.bot, guild_id)
+        return queue
+
+    def depths(self) -> Dict[int, int]:
+        return {guild_id: queue.depth for guild_id, queue in self._queues.items()}
+
+    def close(self):
+        for queue in self._queues.values():
+            queue.close()
@@ -2,7 +2,7 @@ import io
 
 import disnake
 
-from .views import Delete
+from .views import delete_button
 
 async def safe_send_prepare(content, **kwargs):
     """Same as send except with some safe guards.
@@ -22,9 +22,7 @@ async def safe_send_prepare(content, **kwargs):
 async def wait_for_deletion(
     author_id: int,
     message_kwargs: dict,
-    destination: disnake.abc.Messageable,
-    timeout: float = 60 * 5
+    destination: disnake.abc.Messageable
 ) -> None:
-    view = Delete(author_id=author_id, timeout=timeout)
-    message_kwargs['view'] = view
+    message_kwargs['components'] = [delete_button(author_id)]
     await destination.send(**message_kwargs)
\ No newline at end of file
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import time
+import asyncio
+import traceback
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
+
+from disnake.ext import commands
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+SAMPLE_INTERVAL = 15.  # seconds
+
+class ShardHealth(NamedTuple):
+    shard_id: int
+    latency: float
+    events_per_second: float
+    reconnects: int
+    resumes: int
+    disconnects: int
+
+class ShardMonitor:
+    """Per-shard gateway latency, event rate and reconnects.
+
+    The event rate comes from the gateway sequence number,
+    so no handler runs for every received event.
+    """
+
+    def __init__(self, bot: DisnakeHelper, *, interval: float = SAMPLE_INTERVAL):
+        self.bot = bot
+        self.interval = interval
+        self.rates: Dict[int, float] = {}
+        self.connects: Counter[int] = Counter()
+        self.resumes: Counter[int] = Counter()
+        self.disconnects: Counter[int] = Counter()
+        self._sequences: Dict[int, int] = {}
+        self._sampled = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+        if isinstance(bot, commands.AutoShardedBot):
+            bot.add_listener(self.on_shard_connect)
+            bot.add_listener(self.on_shard_resumed)
+            bot.add_listener(self.on_shard_disconnect)
+        else:
+            bot.add_listener(self.on_shard_connect, 'on_connect')
+            bot.add_listener(self.on_shard_resumed, 'on_resumed')
+            bot.add_listener(self.on_shard_disconnect, 'on_disconnect')
+
+    def start(self):
+        self._task = self.bot.loop.create_task(self._sample_loop())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def _shard_id(self, shard_id: Optional[int]) -> int:
+        if shard_id is None:
+            return self.bot.shard_id or 0
+        return shard_id
+
+    async def on_shard_connect(self, shard_id: Optional[int] = None):
+        shard_id = self._shard_id(shard_id)
+        self.connects[shard_id] += 1
+        if self.connects[shard_id] > 1:
+            self.bot.metrics.inc('shard_reconnects_total', shard=shard_id)
+
+    async def on_shard_resumed(self, shard_id: Optional[int] = None):
+        shard_id = self._shard_id(shard_id)
+        self.resumes[shard_id] += 1
+        self.bot.metrics.inc('shard_resumes_total', shard=shard_id)
+
+    async def on_shard_disconnect(self, shard_id: Optional[int] = None):
+        shard_id = self._shard_id(shard_id)
+        self.disconnects[shard_id] += 1
+        self.bot.metrics.inc('shard_disconnects_total', shard=shard_id)
+
+    def _websockets(self) -> Dict[int, Any]:
+        if isinstance(self.bot, commands.AutoShardedBot):
+            return {shard_id: info._parent.ws for shard_id, info in self.bot.shards.items()}
+        if self.bot.ws is None:
+            return {}
+        return {self.bot.shard_id or 0: self.bot.ws}
+
+    def sample(self):
+        now = time.monotonic()
+        elapsed = max(now - self._sampled, 1e-9)
+        self._sampled = now
+
+        metrics = self.bot.metrics
+        for shard_id, ws in self._websockets().items():
+            sequence = ws.sequence or 0
+            last = self._sequences.get(shard_id, 0)
+            # a new session starts the sequence from the beginning
+            events = sequence - last if sequence >= last else sequence
+            self._sequences[shard_id] = sequence
+            self.rates[shard_id] = events / elapsed
+
+            metrics.set('shard_latency_seconds', ws.latency, shard=shard_id)
+            metrics.set('shard_events_per_second', self.rates[shard_id], shard=shard_id)
+            metrics.inc('shard_events_total', events, shard=shard_id)
+
+    def health(self) -> List[ShardHealth]:
+        return [
+            ShardHealth(
+                shard_id,
+                ws.latency,
+                self.rates.get(shard_id, 0.),
+                max(self.connects[shard_id] - 1, 0),
+                self.resumes[shard_id],
+                self.disconnects[shard_id]
+            )
+            for shard_id, ws in sorted(self._websockets().items())
+        ]
+
+    async def _sample_loop(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                self.sample()
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import re
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from tortoise import Tortoise
+
+from .metrics import current_interaction
+
+if TYPE_CHECKING:
+    from bot import DisnakeHelper
+
+log = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.1  # seconds
+MAX_SHAPES = 1000
+
+_literal_re = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\$\d+")
+_in_list_re = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', flags=re.IGNORECASE)
+_space_re = re.compile(r'\s+')
+
+def normalize_sql(sql: str) -> str:
+    sql = _literal_re.sub('?', sql)
+    sql = _in_list_re.sub('IN (...)', sql)
+    return _space_re.sub(' ', sql).strip()
+
+class QueryShape:
+    __slots__ = ('sql', 'count', 'total', 'max', 'slow', 'plan', 'last_source')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        self.slow = 0
+        self.plan: Optional[str] = None
+        self.last_source: Optional[str] = None
+
+class SlowQueryLog:
+    """Times every ORM query, logs the slow ones and keeps the most expensive query shapes."""
+
+    def __init__(self, bot: DisnakeHelper, *, threshold: Optional[float] = None, explain: bool = True):
+        self.bot = bot
+        self.threshold = DEFAULT_THRESHOLD if threshold is None else threshold
+        self.explain = explain
+        self.shapes: Dict[str, QueryShape] = {}
+        self._explained: Set[str] = set()
+
+    def source(self) -> str:
+        ctx = current_interaction.get()
+        if ctx is None:
+            return 'background'
+        command = self.bot.get_slash_command(ctx.command.split()[0])
+        cog = command and command.cog_name
+        return f'{cog}: /{ctx.command}' if cog else f'/{ctx.command}'
+
+    def __call__(self, sql: str, values: Optional[list], duration: float) -> None:
+        if sql.startswith('EXPLAIN'):
+            return
+        normalized = normalize_sql(sql)
+        shape = self.shapes.get(normalized)
+        if shape is None:
+            if len(self.shapes) >= MAX_SHAPES:
+                cheapest = min(self.shapes.values(), key=lambda s: s.total)
+                del self.shapes[cheapest.sql]
+            shape = self.shapes[normalized] = QueryShape(normalized)
+        shape.count += 1
+        shape.total += duration
+        shape.max = max(shape.max, duration)
+
+        if duration < self.threshold:
+            return
+        shape.slow += 1
+        shape.last_source = self.source()
+        log.warning('Slow query (%.1fms) from %s: %s %r', duration * 1000, shape.last_source, sql, values)
+
+        if self.explain and normalized not in self._explained:
+            self._explained.add(normalized)
+            asyncio.ensure_future(self._explain(shape, sql, values))
+
+    async def _explain(self, shape: QueryShape, sql: str, values: Optional[list]) -> None:
+        client = Tortoise.get_connection('master')
+        prefix = 'EXPLAIN' if client.capabilities.dialect == 'postgres' else 'EXPLAIN QUERY PLAN'
+        try:
+            rows = await client.execute_query_dict(f'{prefix} {sql}', values)
+        except Exception as e:
+            shape.plan = f'could not explain: {e}'
+        else:
+            shape.plan = '\n'.join(' '.join(str(v) for v in row.values()) for row in rows)
+            log.warning('Query plan for %s:\n%s', shape.sql, shape.plan)
+
+    def top(self, n: int = 10) -> List[QueryShape]:
+        return sorted(self.shapes.values(), key=lambda s: s.total, reverse=True)[:n]
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from tortoise.transactions import in_transaction
+
+import config
+from .db.tags import TagTable, TagTrend
+
+HALF_LIFE = float(config.values.trending_half_life or 24) * 3600  # seconds
+TOP_K = int(config.values.trending_top_k or 100)
+# scores decayed below 2**-20 of one use are forgotten
+FORGET_AFTER = 20  # half-lives
+
+def _log2_add(a: float, b: float) -> float:
+    """``log2(2**a + 2**b)`` without overflowing."""
+    if a < b:
+        a, b = b, a
+    if b == -math.inf:
+        return a
+    return a + math.log2(1 + 2 ** (b - a))
+
+class TrendingTags:
+    """Exponentially decayed use counts of tags and the top ``k`` of them.
+
+    A use at time ``t`` adds ``2**(t / half_life)``, so scores never have to be
+    decayed to be compared and the order only changes on a use. Scores are kept
+    as log2 of that, which doesn't overflow. A use is O(1) plus an insertion
+    into the top ``k`` list, reading the top is a slice of it.
+    """
+
+    def __init__(self, *, half_life: float = HALF_LIFE, k: int = TOP_K):
+        self.half_life = half_life
+        self.k = k
+        self._scores: Dict[int, float] = {}
+        # tag_id: (name, prefix)
+        self._tags: Dict[int, Tuple[str, str]] = {}
+        # uses not written to the database yet, in the same log scale
+        self._pending: Dict[int, float] = {}
+        # tag ids by descending score
+        self._top: List[int] = []
+
+    def _now(self) -> float:
+        return time.time() / self.half_life
+
+    def _promote(self, tag_id: int):
+        score = self._scores[tag_id]
+        if tag_id in self._top:
+            self._top.remove(tag_id)
+        elif len(self._top) >= self.k and score <= self._scores[self._top[-1]]:
+            return
+        index = len(self._top)
+        while index and self._scores[self._top[index - 1]] < score:
+            index -= 1
+        self._top.insert(index, tag_id)
+        del self._top[self.k:]
+
+    def use(self, tag_id: int, name: str, prefix: str):
+        now = self._now()
+        self._scores[tag_id] = _log2_add(self._scores.get(tag_id, -math.inf), now)
+        self._pending[tag_id] = _log2_add(self._pending.get(tag_id, -math.inf), now)
+        self._tags[tag_id] = (name, prefix)
+        self._promote(tag_id)
+
+    def discard(self, tag_id: int):
+        """Forgets a deleted tag."""
+        self._scores.pop(tag_id, None)
+        self._pending.pop(tag_id, None)
+        self._tags.pop(tag_id, None)
+        if tag_id in self._top:
+            self._rebuild_top()
+
+    def _rebuild_top(self):
+        self._top = sorted(self._scores, key=self._scores.__getitem__, reverse=True)[:self.k]
+
+    def top(self, count: int) -> List[Tuple[str, str, float]]:
+        """``(name, prefix, score)`` of the ``count`` most trending tags,
+        the score is roughly the number of uses in the last ``half_life / ln 2``.
+        """
+        now = self._now()
+        return [(*self._tags[tag_id], 2 ** (self._scores[tag_id] - now)) for tag_id in self._top[:count]]
+
+    def matching(self, text: str) -> Iterable[Tuple[str, str]]:
+        """``(name, prefix)`` of trending tags which names contain ``text``, most trending first."""
+        text = text.lower()
+        for tag_id in self._top:
+            name, prefix = self._tags[tag_id]
+            if text in name.lower():
+                yield name, prefix
+
+    async def load(self):
+        cutoff = self._now() - FORGET_AFTER
+        trends = await TagTrend.filter(score__gt=cutoff).values_list('tag_id', 'score')
+        tags = {
+            id: (name, prefix)
+            for id, name, prefix in await (TagTable
+                .filter(id__in=[tag_id for tag_id, _ in trends])
+                .values_list('id', 'name', 'prefix')
+            )
+        }
+        for tag_id, score in trends:
+            if tag_id in tags:
+                self._scores[tag_id] = _log2_add(self._scores.get(tag_id, -math.inf), score)
+                self._tags[tag_id] = tags[tag_id]
+        self._rebuild_top()
+
+    async def flush(self):
+        """Adds the pending uses to the stored scores, other processes' uses are picked up on the way."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            async with in_transaction('master') as conn:
+                stored = dict(await (TagTrend
+                    .filter(tag_id__in=list(pending))
+                    .using_db(conn)
+                    .select_for_update()
+                    .values_list('tag_id', 'score')
+                ))
+                new = []
+                for tag_id, score in pending.items():
+                    if tag_id not in stored:
+                        new.append(TagTrend(tag_id=tag_id, score=score))
+                        continue
+                    score = _log2_add(stored[tag_id], score)
+                    await TagTrend.filter(tag_id=tag_id).using_db(conn).update(score=score)
+                    if tag_id in self._scores and score > self._scores[tag_id]:
+                        self._scores[tag_id] = score
+                        self._promote(tag_id)
+                await TagTrend.bulk_create(new)
+        except Exception:
+            # keep the uses for the next flush
+            for tag_id, score in pending.items():
+                self._pending[tag_id] = _log2_add(self._pending.get(tag_id, -math.inf), score)
+            raise
+        self._forget()
+
+    def _forget(self):
+        cutoff = self._now() - FORGET_AFTER
+        top = set(self._top)
+        for tag_id in [tag_id for tag_id, score in self._scores.items() if score < cutoff and tag_id not in top]:
+            del self._scores[tag_id]
+            del self._tags[tag_id]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+import gzip
+import asyncio
+import unicodedata
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+CACHE_PATH = f'data/unicode-names-{unicodedata.unidata_version}.txt.gz'
+
+def _scan() -> List[Tuple[str, str]]:
+    entries = []
+    for code in range(0x110000):
+        name = unicodedata.name(chr(code), None)
+        if name is not None:
+            entries.append((name, chr(code)))
+    return entries
+
+def _load(cache_path: Optional[str]) -> List[Tuple[str, str]]:
+    if cache_path and os.path.exists(cache_path):
+        with gzip.open(cache_path, 'rt', encoding='utf-8') as fp:
+            return [(name, chr(int(code, 16))) for code, name in (line.rstrip('\n').split('\t') for line in fp)]
+
+    entries = _scan()
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with gzip.open(cache_path, 'wt', encoding='utf-8') as fp:
+            fp.writelines(f'{ord(char):x}\t{name}\n' for name, char in entries)
+    return entries
+
+def _tokens(name: str) -> List[str]:
+    return name.replace('-', ' ').split()
+
+class UnicodeIndex:
+    """Character name index: sorted names for whole-name prefixes
+    and an inverted index of name words for multi-word queries.
+    """
+
+    def __init__(self, entries: List[Tuple[str, str]]):
+        entries.sort()
+        self.names = [name for name, _ in entries]
+        self.chars = [char for _, char in entries]
+        # names as ' WORD WORD', so a word prefix check is a substring check
+        self._spaced = [' ' + ' '.join(_tokens(name)) for name in self.names]
+
+        postings: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.names):
+            for token in set(_tokens(name)):
+                postings.setdefault(token, []).append(i)
+        self.tokens = sorted(postings)
+        self.postings = [postings[token] for token in self.tokens]
+        # postings size of tokens[:i], to size a token prefix range in O(1)
+        self._sizes = [0, *accumulate(len(p) for p in self.postings)]
+
+    def _token_range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect_left(self.tokens, prefix)
+        end = bisect_left(self.tokens, prefix + '\U0010ffff', start)
+        return start, end
+
+    def search(self, query: str, limit: int = 25) -> List[Tuple[str, str]]:
+        """Returns up to ``limit`` of ``(name, char)``, names starting with the query first."""
+        words = _tokens(query.upper())
+        if not words:
+            return []
+        found: List[int] = []
+        seen = set()
+
+        phrase = ' '.join(words)
+        i = bisect_left(self.names, phrase)
+        while i < len(self.names) and len(found) < limit and self.names[i].startswith(phrase):
+            found.append(i)
+            seen.add(i)
+            i += 1
+
+        if len(found) < limit:
+            ranges = [self._token_range(word) for word in words]
+            # walk the rarest word, check the others on the name itself
+            driver = min(range(len(words)), key=lambda w: self._sizes[ranges[w][1]] - self._sizes[ranges[w][0]])
+            others = [' ' + word for w, word in enumerate(words) if w != driver]
+            start, end = ranges[driver]
+            for t in range(start, end):
+                for i in self.postings[t]:
+                    if i in seen:
+                        continue
+                    spaced = self._spaced[i]
+                    if all(word in spaced for word in others):
+                        found.append(i)
+                        seen.add(i)
+                        if len(found) >= limit:
+                            break
+                if len(found) >= limit:
+                    break
+
+        return [(self.names[i], self.chars[i]) for i in found]
+
+_index: Optional[UnicodeIndex] = None
+_lock = asyncio.Lock()
+
+async def get_index(cache_path: Optional[str] = CACHE_PATH) -> UnicodeIndex:
+    """Builds the index in a worker thread on the first call."""
+    global _index
+    if _index is None:
+        async with _lock:
+            if _index is None:
+                loop = asyncio.get_running_loop()
+                _index = await loop.run_in_executor(None, lambda: UnicodeIndex(_load(cache_path)))
+    return _index
@@ -1,4 +1,7 @@
-from typing import Any, Callable, Coroutine, Sequence, Tuple, Union, Optional
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
 from disnake import (
     ui,
     MessageInteraction,
@@ -6,26 +9,74 @@ from disnake import (
 )
 from .emojis import accept_mark, deny_mark
 
-class _BaseView(ui.View):
-    def __init__(
-        self,
-        *,
-        author_id: int,
-        timeout: Optional[float] = 180.
-    ):
-        if not author_id:
-            raise TypeError('listen_to cannot be with zero length')
-        super().__init__(timeout=timeout)
-        self.author_id = author_id
+# Persistent components keep all of their state in ``custom_id``, so the bot
+# holds no per-message objects and buttons keep working across restarts.
+# Format: ``p:<action>:<author_id>:<target_id>:<page>`` (max 100 characters).
+CUSTOM_ID_PREFIX = 'p'
+
+class ComponentState(NamedTuple):
+    action: str
+    author_id: int
+    target_id: int = 0
+    page: int = 0
+
+    def to_custom_id(self) -> str:
+        custom_id = f'{CUSTOM_ID_PREFIX}:{self.action}:{self.author_id}:{self.target_id}:{self.page}'
+        if len(custom_id) > 100:
+            raise ValueError('custom_id cannot be longer than 100 characters')
+        return custom_id
+
+    @classmethod
+    def from_custom_id(cls, custom_id: str) -> Optional[ComponentState]:
+        prefix, _, rest = custom_id.partition(':')
+        if prefix != CUSTOM_ID_PREFIX:
+            return None
+        try:
+            action, author_id, target_id, page = rest.rsplit(':', 3)
+            return cls(action, int(author_id), int(target_id), int(page))
+        except ValueError:
+            return None
+
+def make_custom_id(action: str, author_id: int, target_id: int = 0, page: int = 0) -> str:
+    return ComponentState(action, author_id, target_id, page).to_custom_id()
+
+PersistentHandler = Callable[[MessageInteraction, ComponentState], Awaitable[None]]
+_handlers: Dict[str, PersistentHandler] = {}
+
+def persistent_handler(action: str):
+    """Registers a coroutine as the only handler of components with given action.
+    Registering the same action again replaces the handler (e.g. on extension reload).
+    """
+    def decorator(func: PersistentHandler) -> PersistentHandler:
+        _handlers[action] = func
+        return func
+    return decorator
 
-    async def interaction_check(self, interaction: MessageInteraction) -> bool:
-        if (
-            (interaction.author and interaction.author.id == self.author_id) or
-            (interaction.bot    and interaction.author.id in interaction.bot.owner_ids)
-        ):
-            return True
-        await interaction.response.send_message('You cannot interact with this menu.', ephemeral=True)
+def remove_persistent_handler(action: str) -> None:
+    _handlers.pop(action, None)
+
+async def dispatch_persistent(interaction: MessageInteraction) -> bool:
+    """Routes a component interaction to its registered handler.
+    Returns ``False`` if the interaction is not a persistent one.
+    """
+    state = ComponentState.from_custom_id(interaction.data.custom_id)
+    if state is None:
         return False
+    handler = _handlers.get(state.action)
+    if handler is None:
+        await interaction.response.send_message('This menu is no longer available.', ephemeral=True)
+        return True
+    await handler(interaction, state)
+    return True
+
+async def author_check(interaction: MessageInteraction, state: ComponentState) -> bool:
+    if (
+        (interaction.author and interaction.author.id == state.author_id) or
+        (interaction.bot    and interaction.author.id in interaction.bot.owner_ids)
+    ):
+        return True
+    await interaction.response.send_message('You cannot interact with this menu.', ephemeral=True)
+    return False
 
 
 confirm_emojis = {
@@ -33,36 +84,65 @@ confirm_emojis = {
     False: deny_mark
 }
 
-class ConfirmButton(ui.Button['Confirm']):
-    def __init__(self, value: bool, *, style: ButtonStyle = ..., label: Optional[str] = None):
-        super().__init__(style=style, label=label, emoji=confirm_emojis[bool(value)])
-        self.value = value
+_pending_confirms: Dict[int, asyncio.Future] = {}
 
-    async def callback(self, interaction: MessageInteraction):
-        await interaction.response.defer()
-        self.view.value = self.value
-        self.view.stop()
-
-class Confirm(_BaseView):
-    def __init__(self, *, author_id: int, timeout: Optional[float] = 180.):
-        super().__init__(author_id=author_id, timeout=timeout)
+class Confirm:
+    """Yes/no prompt. Only an awaiting future is kept in memory,
+    so an expired or restarted prompt just tells the user so.
+    """
+    def __init__(self, *, author_id: int, nonce: int, timeout: Optional[float] = 180.):
+        if not author_id:
+            raise TypeError('author_id cannot be zero')
+        self.author_id = author_id
+        self.nonce = nonce
+        self.timeout = timeout
         self.value = None
 
-        self.add_item(ConfirmButton(True, style=ButtonStyle.green))
-        self.add_item(ConfirmButton(False, style=ButtonStyle.red))
-    
+    @property
+    def components(self) -> List[ui.Button]:
+        return [
+            ui.Button(
+                style=ButtonStyle.green, emoji=confirm_emojis[True],
+                custom_id=make_custom_id('confirm', self.author_id, self.nonce, 1)
+            ),
+            ui.Button(
+                style=ButtonStyle.red, emoji=confirm_emojis[False],
+                custom_id=make_custom_id('confirm', self.author_id, self.nonce, 0)
+            )
+        ]
+
     async def start(self) -> Optional[bool]:
-        await self.wait()
+        future = asyncio.get_running_loop().create_future()
+        _pending_confirms[self.nonce] = future
+        try:
+            self.value = await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            _pending_confirms.pop(self.nonce, None)
         return self.value
 
-class Delete(_BaseView):
-    def __init__(self, *, author_id: int, timeout: Optional[float] = 180.):
-        super().__init__(author_id=author_id, timeout=timeout)
-    
-    @ui.button(
+@persistent_handler('confirm')
+async def _confirm_handler(interaction: MessageInteraction, state: ComponentState):
+    if not await author_check(interaction, state):
+        return
+    future = _pending_confirms.pop(state.target_id, None)
+    if future is None or future.done():
+        await interaction.response.edit_message(content='This prompt has expired.', components=[])
+        return
+    await interaction.response.defer()
+    future.set_result(bool(state.page))
+
+def delete_button(author_id: int) -> ui.Button:
+    return ui.Button(
         label='Delete',
-        emoji='\N{WASTEBASKET}'
+        emoji='\N{WASTEBASKET}',
+        custom_id=make_custom_id('delete', author_id)
     )
-    async def delete_button(self, _, interaction: MessageInteraction):
-        await interaction.response.defer()
-        await interaction.delete_original_message()
\ No newline at end of file
+
+@persistent_handler('delete')
+async def _delete_handler(interaction: MessageInteraction, state: ComponentState):
+    if not await author_check(interaction, state):
+        return
+    await interaction.response.defer()
+    await interaction.delete_original_message()
@@ -3,4 +3,6 @@
 from bot import DisnakeHelper
 import config
 
-DisnakeHelper().run(config.values.token)
+# the offload process pool imports this module in its workers
+if __name__ == '__main__':
+    DisnakeHelper().run(config.values.token)
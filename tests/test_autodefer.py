@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from disnake import InteractionResponse
+from disnake.ext import commands
+
+from bot import DisnakeHelper
+from cogs.utils.autodefer import AutoDeferResponse
+
+class FakeInteraction:
+    """What disnake's ``Interaction`` does with the response and the followup webhook."""
+
+    def __init__(self, calls: list):
+        self.calls = calls
+        self.user = 'user#0000'
+        self.channel = SimpleNamespace(id=1)
+        self.application_command = SimpleNamespace(qualified_name='tag show')
+        self.options = {}
+        self.followup = SimpleNamespace(send=self._followup)
+        self.response = AutoDeferResponse(self)
+
+    async def _followup(self, content=None, **kwargs):
+        self.calls.append(('followup', str(content), kwargs.get('ephemeral', False)))
+
+    async def delete_original_message(self):
+        self.calls.append(('delete_original',))
+
+    async def send(self, content=None, **kwargs):
+        if self.response._responded:
+            return await self.followup.send(content, **kwargs)
+        return await self.response.send_message(content, **kwargs)
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    async def defer(self, *, ephemeral=False, **kwargs):
+        calls.append(('defer', ephemeral))
+        self._responded = True
+
+    async def send_message(self, content=None, **kwargs):
+        calls.append(('send_message', str(content), kwargs.get('ephemeral', False)))
+        self._responded = True
+
+    monkeypatch.setattr(InteractionResponse, 'defer', defer)
+    monkeypatch.setattr(InteractionResponse, 'send_message', send_message)
+    return calls
+
+def error_hook(interaction, exception):
+    bot = SimpleNamespace(
+        error_reporter=SimpleNamespace(report=lambda *args: None),
+        recorder=SimpleNamespace(mark_error=lambda interaction: None)
+    )
+    return DisnakeHelper.on_slash_command_error(bot, interaction, exception)
+
+@pytest.mark.parametrize('exception', [commands.CheckFailure('not allowed'), ValueError('boom')])
+def test_error_after_public_auto_defer_is_ephemeral(calls, exception):
+    async def run():
+        interaction = FakeInteraction(calls)
+        assert await interaction.response.auto_defer()
+        await error_hook(interaction, commands.CommandInvokeError(exception))
+
+    asyncio.run(run())
+    assert calls[0] == ('defer', False)
+    # the public "thinking" message is replaced by an ephemeral followup
+    assert calls[1] == ('delete_original',)
+    assert calls[2][0] == 'followup' and calls[2][2] is True
+
+def test_error_before_any_response_is_ephemeral(calls):
+    async def run():
+        await error_hook(FakeInteraction(calls), commands.CheckFailure('not allowed'))
+
+    asyncio.run(run())
+    assert calls == [('send_message', 'not allowed', True)]
+
+def test_only_first_followup_replaces_thinking_message(calls):
+    async def run():
+        interaction = FakeInteraction(calls)
+        await interaction.response.auto_defer()
+        await interaction.response.send_message('result')
+        await interaction.response.send_message('note', ephemeral=True)
+
+    asyncio.run(run())
+    assert calls == [('defer', False), ('followup', 'result', False), ('followup', 'note', True)]
+
+def test_handler_defer_after_auto_defer_does_nothing(calls):
+    async def run():
+        interaction = FakeInteraction(calls)
+        await interaction.response.auto_defer()
+        await interaction.response.defer()
+
+    asyncio.run(run())
+    assert calls == [('defer', False)]
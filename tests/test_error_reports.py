@@ -0,0 +1,27 @@
+import asyncio
+from types import SimpleNamespace
+
+from cogs.utils.error_reports import ErrorReporter
+from cogs.utils.metrics import Metrics
+
+def test_failed_persist_is_logged(tmp_path, capsys):
+    # a file where the reports directory should be
+    directory = tmp_path / 'errors'
+    directory.write_text('')
+
+    async def run():
+        bot = SimpleNamespace(loop=asyncio.get_running_loop(), metrics=Metrics())
+        reporter = ErrorReporter(bot, directory=str(directory))
+        try:
+            raise ValueError('boom')
+        except ValueError as e:
+            reporter.report(e, 'context')
+        await asyncio.gather(*reporter._writes, return_exceptions=True)
+        await asyncio.sleep(0)
+        return reporter
+
+    reporter = asyncio.run(run())
+    assert not reporter._writes
+    out = capsys.readouterr()
+    assert 'Failed to write error report' in out.out
+    assert 'FileExistsError' in out.err
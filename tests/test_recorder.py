@@ -0,0 +1,49 @@
+import asyncio
+from types import SimpleNamespace
+
+import disnake
+from disnake.ext import commands
+
+from benchmarks.fakes import FakeBot
+from bot import DisnakeHelper
+from cogs.utils.recorder import InteractionRecorder
+
+class Bot(FakeBot):
+    """Dispatches events like disnake does, as tasks."""
+    _listeners = {}
+    dispatch = disnake.Client.dispatch
+    _schedule_event = disnake.Client._schedule_event
+    _run_event = disnake.Client._run_event
+    on_slash_command_error = DisnakeHelper.on_slash_command_error
+
+    def __init__(self):
+        super().__init__()
+        self.loop = asyncio.get_running_loop()
+        self.error_reporter = SimpleNamespace(report=lambda *args: None)
+        self.recorder = InteractionRecorder(self, enabled=True)
+
+async def handle(bot: Bot, exception=None) -> dict:
+    interaction = bot.interaction()
+    with bot.recorder.track('slash_command', interaction, 'tag show'):
+        if exception is not None:
+            # disnake catches the command's exception and dispatches it
+            bot.dispatch('slash_command_error', interaction, commands.CommandInvokeError(exception))
+    for _ in range(3):
+        await asyncio.sleep(0)
+    return bot.recorder._buffer[-1]
+
+def test_failed_command_is_recorded_as_error():
+    async def run():
+        bot = Bot()
+        return await handle(bot, commands.CheckFailure('not allowed')), bot
+
+    entry, bot = asyncio.run(run())
+    assert entry['command'] == 'tag show'
+    assert entry['error'] is True
+    assert not bot.recorder._tracking
+
+def test_successful_command_is_not_an_error():
+    async def run():
+        return await handle(Bot())
+
+    assert 'error' not in asyncio.run(run())
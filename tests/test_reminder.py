@@ -0,0 +1,78 @@
+import asyncio
+import datetime
+
+from tortoise import Tortoise
+
+from benchmarks.db_startup import orm_config
+from cogs.reminder import Reminder
+from cogs.utils import db
+from cogs.utils.db.remind import Reminders
+
+class Bot:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.dispatched = []
+
+    async def wait_until_ready(self):
+        # the timer loop isn't run, refills are driven by the test
+        await asyncio.Event().wait()
+
+    def dispatch(self, event, *args):
+        self.dispatched.append(event)
+
+def test_timer_created_during_slow_first_refill_is_loaded(tmp_path, monkeypatch):
+    async def run():
+        await db.init(orm_config=orm_config(str(tmp_path / 'db.sqlite')))
+        try:
+            cog = Reminder(Bot())
+            queried, release = asyncio.Event(), asyncio.Event()
+            query = Reminders.all
+
+            class SlowQuery:
+                # the query runs before the timer is created, its rows come back after
+                def __init__(self):
+                    self.queryset = query()
+
+                def __getattr__(self, name):
+                    def chain(*args):
+                        self.queryset = getattr(self.queryset, name)(*args)
+                        return self
+                    return chain
+
+                def __await__(self):
+                    async def rows():
+                        result = await self.queryset
+                        queried.set()
+                        await release.wait()
+                        return result
+                    return rows().__await__()
+
+            monkeypatch.setattr(Reminders, 'all', SlowQuery)
+            refill = asyncio.ensure_future(cog._refill())
+            await queried.wait()
+            when = datetime.datetime.utcnow() + datetime.timedelta(minutes=5)
+            timer = await cog.create_timer(when, 'reminder', 1)
+            release.set()
+            await refill
+
+            assert [entry[1] for entry in cog._heap] == [timer.id]
+            cog.cog_unload()
+        finally:
+            await Tortoise.close_connections()
+
+    asyncio.run(run())
+
+def test_timers_from_first_refill_are_not_duplicated(tmp_path):
+    async def run():
+        await db.init(orm_config=orm_config(str(tmp_path / 'db.sqlite')))
+        try:
+            cog = Reminder(Bot())
+            when = datetime.datetime.utcnow() + datetime.timedelta(minutes=5)
+            timer = await cog.create_timer(when, 'reminder', 1)
+            await cog._refill()
+            assert [entry[1] for entry in cog._heap] == [timer.id]
+            cog.cog_unload()
+        finally:
+            await Tortoise.close_connections()
+
+    asyncio.run(run())
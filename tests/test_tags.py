@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+from cogs.tags import TagCreateView
+
+class Cog:
+    def __init__(self, reserved: bool):
+        self.bot = None
+        self.reserved = reserved
+
+    async def reserve_tag_name(self, name, owner_id):
+        return self.reserved
+
+class Message:
+    def __init__(self):
+        self.edits = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+
+class Response:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+
+def interaction(author):
+    return SimpleNamespace(author=author, response=Response())
+
+async def view_with_name(reserved: bool):
+    author = SimpleNamespace(id=1)
+    view = TagCreateView(SimpleNamespace(author=author), Cog(reserved))
+    view.message = Message()
+    view.name = 'embed'
+    view.remove_item(view.name_button)
+    return view, interaction(author)
+
+def test_lost_name_reservation_resets_the_name():
+    async def run():
+        view, inter = await view_with_name(reserved=False)
+        assert not await view.interaction_check(inter)
+        return view, inter
+
+    view, inter = asyncio.run(run())
+    assert view.name is None
+    assert view.children[0] is view.name_button
+    content, kwargs = inter.response.sent[0]
+    assert 'press "Name"' in content and kwargs['ephemeral']
+    assert view.message.edits
+    confirm = next(child for child in view.children if child.label == 'Confirm')
+    assert confirm.disabled
+
+def test_renewed_name_reservation_continues():
+    async def run():
+        view, inter = await view_with_name(reserved=True)
+        assert await view.interaction_check(inter)
+        return view, inter
+
+    view, inter = asyncio.run(run())
+    assert view.name == 'embed'
+    assert not inter.response.sent